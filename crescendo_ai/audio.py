@@ -9,14 +9,16 @@ It supports playlists and scheduling based on a YAML configuration file.
 import os
 import logging
 import time
-from typing import Optional, List, Dict
+from typing import Optional, List, Tuple
 
-# Set environment variable for pygame NEON support on ARM processors
-if 'arm' in os.uname().machine:
-    os.environ['PYGAME_DETECT_AVX2'] = '1'
+# pygame is imported in the methods that use it: importing it loads SDL, which is slow on a Raspberry Pi,
+# and isn't needed by code that only lists tracks or reads the configuration.
+from crescendo_ai.config import MusicConfig, Playlist, Track, list_audio_files, load_music_config
 
-import pygame
-from crescendo_ai.config import MusicConfig, Playlist, load_music_config
+# Mixer settings. A larger buffer means fewer wakeups of the audio thread and no underruns on a Raspberry Pi,
+# at the cost of some latency, which doesn't matter for background music.
+MIXER_FREQUENCY = 44100
+MIXER_BUFFER = 4096
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +36,12 @@ class AudioPlayer:
         self.music_dir = music_dir
         self._is_initialized = False
         self._current_track: Optional[str] = None
-        self._is_playing = False
+        # Whether the mixer was busy at the previous check, to detect the end of a track
+        self._was_busy = False
+        # Track queued in the mixer to start as soon as the current one ends, and the playback
+        # position at the previous check, which jumps back when the queued track starts
+        self._queued_track: Optional[str] = None
+        self._last_pos = 0
         self._current_playlist: Optional[Playlist] = None
 
         # Set default config path if not provided
@@ -52,34 +59,34 @@ class AudioPlayer:
         Returns:
             bool: True if initialization successful, False otherwise
         """
+        import pygame
+
         try:
-            # Initialize pygame with a dummy video system to support event handling
-            pygame.init()
-            # Initialize the mixer specifically for audio
-            pygame.mixer.init()
+            # Only the mixer is needed: track ends are detected by polling, not through the event queue
+            pygame.mixer.init(frequency=MIXER_FREQUENCY, size=-16, channels=2, buffer=MIXER_BUFFER)
             self._is_initialized = True
             logger.info("Audio player initialized")
 
             # Load music configuration if the file exists
             if os.path.exists(self.config_path):
                 self.music_config = load_music_config(self.config_path, self.music_dir)
-                logger.info(f"Loaded music configuration from {self.config_path}")
+                logger.info("Loaded music configuration from %s", self.config_path)
             else:
-                logger.info(f"No music configuration file found at {self.config_path}, using default behavior")
+                logger.info("No music configuration file found at %s, using default behavior", self.config_path)
 
             return True
         except pygame.error as e:
-            logger.error(f"Failed to initialize audio player: {e}")
+            logger.error("Failed to initialize audio player: %s", e)
             self._is_initialized = False
             return False
 
     def shutdown(self) -> None:
         """Shutdown the audio player."""
+        import pygame
+
         if self._is_initialized:
-            if self._is_playing:
-                self.stop()
+            pygame.mixer.music.stop()
             pygame.mixer.quit()
-            pygame.quit()  # Quit pygame completely
             self._is_initialized = False
             logger.info("Audio player shut down")
 
@@ -99,6 +106,8 @@ class AudioPlayer:
         Returns:
             bool: True if playing, False otherwise
         """
+        import pygame
+
         if not self._is_initialized:
             return False
         return pygame.mixer.music.get_busy()
@@ -124,61 +133,115 @@ class AudioPlayer:
         if playlist_name is not None:
             return self.play_playlist(playlist_name)
 
-        # If we have a current playlist but no specific track, play the next track from the playlist
-        if self._current_playlist is not None and track_path is None:
+        track_path, verified = self._resolve_track(track_path)
+        if track_path is None:
+            logger.error("No music tracks found in directory")
+            return False
+
+        return self._play_track(track_path, verified)
+
+    def _resolve_track(self, track_path: Optional[str]) -> Tuple[Optional[str], bool]:
+        """
+        Decide which track to play.
+
+        In order of preference: the given track, the next track of the current playlist, the current track,
+        the next track of the scheduled playlist and finally the first track in the music directory.
+
+        Args:
+            track_path: Path to the music file to play, or None to pick one
+
+        Returns:
+            Tuple of the path to the track, or None if no track was found, and whether the track is known
+            to exist because it was just found by a directory scan
+        """
+        if track_path is not None:
+            return track_path, False
+
+        if self._current_playlist is not None:
             next_track = self._current_playlist.get_next_track(self.music_dir)
             if next_track:
-                track_path = next_track
-            else:
-                logger.warning(f"Playlist {self._current_playlist.name} is empty, looking for default track")
+                return next_track, self._is_scanned(self._current_playlist)
+            logger.warning("Playlist %s is empty, looking for default track", self._current_playlist.name)
 
-        # If no track specified, use the current track or find a default
-        if track_path is None:
-            if self._current_track is not None:
-                track_path = self._current_track
-            else:
-                # Try to get a track from the scheduled playlist if available
-                if self.music_config:
-                    current_playlist = self.music_config.get_current_playlist()
-                    if current_playlist:
-                        self._current_playlist = current_playlist
-                        next_track = current_playlist.get_next_track(self.music_dir)
-                        if next_track:
-                            track_path = next_track
-
-                # If still no track, find a default
-                if track_path is None:
-                    track_path = self._find_default_track()
-                    if track_path is None:
-                        logger.error("No music tracks found in directory")
-                        return False
+        if self._current_track is not None:
+            return self._current_track, False
+
+        # Try to get a track from the scheduled playlist if available
+        if self.music_config:
+            current_playlist = self.music_config.get_current_playlist()
+            if current_playlist:
+                self._current_playlist = current_playlist
+                next_track = current_playlist.get_next_track(self.music_dir)
+                if next_track:
+                    return next_track, self._is_scanned(current_playlist)
+
+        # The music directory's listing is cached, so this doesn't scan it again if the playlist already did
+        return self._find_default_track(), True
+
+    def _play_track(self, track_path: str, verified: bool = False) -> bool:
+        """
+        Load and play a music track.
+
+        Args:
+            track_path: Path to the music file to play
+            verified: True if the track was just found by a directory scan, so checking that it exists can be skipped
+
+        Returns:
+            bool: True if playback started successfully, False otherwise
+        """
+        import pygame
 
         # Ensure the track exists
-        if not os.path.exists(track_path):
-            logger.error(f"Track not found: {track_path}")
+        if not verified and not os.path.exists(track_path):
+            logger.error("Track not found: %s", track_path)
             return False
 
         try:
-            # Stop any currently playing music
-            if pygame.mixer.music.get_busy():
-                pygame.mixer.music.stop()
+            # Stop any currently playing music (a no-op when nothing is playing)
+            pygame.mixer.music.stop()
 
             # Load and play the new track
             pygame.mixer.music.load(track_path)
             pygame.mixer.music.play()  # Play once, not looping
 
             self._current_track = track_path
-            self._is_playing = True
-            logger.info(f"Playing track: {os.path.basename(track_path)}")
-
-            # Set up an event to detect when the song ends
-            pygame.mixer.music.set_endevent(pygame.USEREVENT)
+            self._was_busy = True
+            self._last_pos = 0
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Playing track: %s", os.path.basename(track_path))
 
+            self._queue_next_track()
             return True
         except pygame.error as e:
-            logger.error(f"Error playing track: {e}")
+            logger.error("Error playing track: %s", e)
             return False
 
+    def _queue_next_track(self) -> None:
+        """
+        Queue the next track of the current playlist in the mixer.
+
+        The mixer starts a queued track as soon as the current one ends, so there is no gap between
+        tracks while the main loop gets around to noticing the end of the track.
+        """
+        import pygame
+
+        self._queued_track = None
+        if self._current_playlist is None:
+            return
+
+        next_track = self._current_playlist.peek_next_track(self.music_dir)
+        if next_track is None:
+            return
+        if not self._is_scanned(self._current_playlist) and not os.path.exists(next_track):
+            # Leave it to play_next_track to report the missing track when it gets there
+            return
+
+        try:
+            pygame.mixer.music.queue(next_track)
+            self._queued_track = next_track
+        except pygame.error as e:
+            logger.warning("Could not queue next track: %s", e)
+
     def play_playlist(self, playlist_name: str) -> bool:
         """
         Play a playlist by name.
@@ -199,19 +262,19 @@ class AudioPlayer:
 
         playlist = self.music_config.get_playlist(playlist_name)
         if not playlist:
-            logger.error(f"Playlist not found: {playlist_name}")
+            logger.error("Playlist not found: %s", playlist_name)
             return False
 
         self._current_playlist = playlist
-        logger.info(f"Playing playlist: {playlist_name}")
+        logger.info("Playing playlist: %s", playlist_name)
 
         # Play the first track in the playlist
         next_track = playlist.get_next_track(self.music_dir)
         if not next_track:
-            logger.error(f"Playlist {playlist_name} is empty")
+            logger.error("Playlist %s is empty", playlist_name)
             return False
 
-        return self.play(next_track)
+        return self._play_track(next_track, self._is_scanned(playlist))
 
     def play_next_track(self) -> bool:
         """
@@ -236,35 +299,48 @@ class AudioPlayer:
 
         next_track = self._current_playlist.get_next_track(self.music_dir)
         if not next_track:
-            logger.error(f"Playlist {self._current_playlist.name} is empty")
+            logger.error("Playlist %s is empty", self._current_playlist.name)
             return False
 
-        return self.play(next_track)
+        return self._play_track(next_track, self._is_scanned(self._current_playlist))
 
     def check_for_track_end(self) -> None:
         """
         Check if the current track has ended and play the next track if needed.
         This should be called regularly from the main loop.
         """
-        if not self._is_initialized or not self._is_playing:
+        import pygame
+
+        if not self._is_initialized:
             return
 
-        try:
-            # Check for the end-of-track event
-            for event in pygame.event.get():
-                if event.type == pygame.USEREVENT:
-                    logger.debug("Track ended, playing next track")
-                    self.play_next_track()
-        except Exception as e:
-            logger.error(f"Error checking for track end: {e}")
-            # If we get a "video system not initialized" error, try to reinitialize pygame
-            if "video system not initialized" in str(e):
-                logger.warning("Attempting to reinitialize pygame...")
-                try:
-                    pygame.init()
-                    logger.info("Successfully reinitialized pygame")
-                except Exception as reinit_error:
-                    logger.error(f"Failed to reinitialize pygame: {reinit_error}")
+        # The queued track has started when the playback position jumps back
+        if self._queued_track is not None:
+            pos = pygame.mixer.music.get_pos()
+            last_pos = self._last_pos
+            self._last_pos = pos
+            if 0 <= pos < last_pos:
+                self._advance_to_queued_track()
+                return
+
+        # The track has ended when the mixer goes from busy to idle
+        busy = pygame.mixer.music.get_busy()
+        was_busy = self._was_busy
+        self._was_busy = busy
+        if was_busy and not busy:
+            logger.debug("Track ended, playing next track")
+            self.play_next_track()
+
+    def _advance_to_queued_track(self) -> None:
+        """Catch up with the mixer after it started the queued track by itself."""
+        # Advance the playlist past the track the mixer is now playing
+        self._current_playlist.get_next_track(self.music_dir)
+        self._current_track = self._queued_track
+        self._was_busy = True
+        self._last_pos = 0
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Playing track: %s", os.path.basename(self._current_track))
+        self._queue_next_track()
 
     def stop(self) -> bool:
         """
@@ -273,18 +349,24 @@ class AudioPlayer:
         Returns:
             bool: True if stopped successfully, False otherwise
         """
+        import pygame
+
         if not self._is_initialized:
             logger.error("Cannot stop: Audio player not initialized")
             return False
 
         try:
-            if pygame.mixer.music.get_busy():
-                pygame.mixer.music.stop()
-                self._is_playing = False
+            # Stopping is a no-op when nothing is playing, so the mixer is only asked to decide what to log
+            was_playing = pygame.mixer.music.get_busy()
+            pygame.mixer.music.stop()
+            if was_playing:
                 logger.info("Stopped music playback")
+            self._was_busy = False
+            # Stopping also drops the track queued in the mixer
+            self._queued_track = None
             return True
         except pygame.error as e:
-            logger.error(f"Error stopping playback: {e}")
+            logger.error("Error stopping playback: %s", e)
             return False
 
     def set_volume(self, volume: float) -> bool:
@@ -297,6 +379,8 @@ class AudioPlayer:
         Returns:
             bool: True if volume set successfully, False otherwise
         """
+        import pygame
+
         if not self._is_initialized:
             logger.error("Cannot set volume: Audio player not initialized")
             return False
@@ -305,12 +389,25 @@ class AudioPlayer:
             # Ensure volume is within valid range
             volume = max(0.0, min(1.0, volume))
             pygame.mixer.music.set_volume(volume)
-            logger.info(f"Set volume to {volume:.2f}")
+            logger.info("Set volume to %.2f", volume)
             return True
         except pygame.error as e:
-            logger.error(f"Error setting volume: {e}")
+            logger.error("Error setting volume: %s", e)
             return False
 
+    @staticmethod
+    def _is_scanned(playlist: Playlist) -> bool:
+        """
+        Check if the tracks of a playlist come from a directory scan rather than from an explicit list.
+
+        Args:
+            playlist: The playlist to check
+
+        Returns:
+            bool: True if the playlist's tracks were found by scanning its directory
+        """
+        return not playlist.tracks
+
     def _find_default_track(self) -> Optional[str]:
         """
         Find a default music track in the music directory.
@@ -318,46 +415,28 @@ class AudioPlayer:
         Returns:
             Optional[str]: Path to a music file, or None if none found
         """
-        if not os.path.exists(self.music_dir):
-            logger.warning(f"Music directory not found: {self.music_dir}")
+        try:
+            files = list_audio_files(self.music_dir)
+        except FileNotFoundError:
+            logger.warning("Music directory not found: %s", self.music_dir)
             return None
 
-        # Look for common audio file formats
-        audio_extensions = ['.mp3', '.wav', '.ogg', '.flac']
-
-        for file in os.listdir(self.music_dir):
-            file_path = os.path.join(self.music_dir, file)
-            if os.path.isfile(file_path):
-                _, ext = os.path.splitext(file)
-                if ext.lower() in audio_extensions:
-                    return file_path
-
-        return None
+        if not files:
+            return None
+        return files[0].path
 
-    def get_available_tracks(self) -> List[Dict[str, str]]:
+    def get_available_tracks(self) -> List[Track]:
         """
         Get a list of available music tracks.
 
         Returns:
-            List[Dict[str, str]]: List of tracks with name and path
+            List[Track]: List of tracks with name and path
         """
-        tracks = []
-
-        if not os.path.exists(self.music_dir):
-            logger.warning(f"Music directory not found: {self.music_dir}")
-            return tracks
-
-        # Look for common audio file formats
-        audio_extensions = ['.mp3', '.wav', '.ogg', '.flac']
-
-        for file in os.listdir(self.music_dir):
-            file_path = os.path.join(self.music_dir, file)
-            if os.path.isfile(file_path):
-                _, ext = os.path.splitext(file)
-                if ext.lower() in audio_extensions:
-                    tracks.append({
-                        'name': file,
-                        'path': file_path
-                    })
+        try:
+            files = list_audio_files(self.music_dir)
+        except FileNotFoundError:
+            logger.warning("Music directory not found: %s", self.music_dir)
+            return []
 
-        return tracks
+        # Copy the cached listing, so callers are free to modify the result
+        return list(files)
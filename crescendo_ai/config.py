@@ -7,12 +7,127 @@ for playlists and schedules.
 
 import os
 import logging
-import yaml
-from typing import Dict, List, Optional, Any, Union
-from datetime import datetime, time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Any, Tuple, Union
+from datetime import datetime, timedelta
+from time import monotonic, time
 
 logger = logging.getLogger(__name__)
 
+# Parsed configuration files: path -> (mtime in ns, parsed content), so unchanged files are only parsed once
+_CONFIG_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+# Common audio file formats, as a tuple so it can be passed to str.endswith directly
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac')
+
+
+class Track(NamedTuple):
+    """An audio file found in a directory."""
+
+    name: str
+    path: str
+
+
+class _ListingCache:
+    """Cache of the audio files found in directories, invalidated when a directory's mtime changes."""
+
+    def __init__(self, ttl: float = 30.0):
+        """
+        Initialize the listing cache.
+
+        Args:
+            ttl: Time in seconds during which a cached listing is returned without checking the directory's mtime
+        """
+        self.ttl = ttl
+        # directory -> (time of last check, mtime in ns, tracks)
+        self._entries: Dict[str, Tuple[float, int, List[Track]]] = {}
+
+    def get(self, directory: str, ttl: Optional[float] = None) -> List[Track]:
+        """
+        Get the audio files in a directory.
+
+        Args:
+            directory: Directory to list
+            ttl: Overrides the cache's default time to live
+
+        Returns:
+            List of tracks, sorted by name
+
+        Raises:
+            FileNotFoundError: If the directory does not exist
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        now = monotonic()
+        cached = self._entries.get(directory)
+        if cached is not None and now - cached[0] < ttl:
+            return cached[2]
+
+        mtime = os.stat(directory).st_mtime_ns
+        if cached is not None and cached[1] == mtime:
+            self._entries[directory] = (now, mtime, cached[2])
+            return cached[2]
+
+        # A single scandir pass: DirEntry.is_file() reuses the information returned by the directory read
+        with os.scandir(directory) as entries:
+            audio_entries = sorted(
+                (entry for entry in entries if entry.name.lower().endswith(AUDIO_EXTENSIONS) and entry.is_file()),
+                key=lambda entry: entry.name
+            )
+        files = [Track(entry.name, entry.path) for entry in audio_entries]
+
+        self._entries[directory] = (now, mtime, files)
+        return files
+
+    def clear(self) -> None:
+        """Forget all cached listings."""
+        self._entries.clear()
+
+
+_listing_cache = _ListingCache()
+
+
+def _load_yaml(path: str) -> Any:
+    """
+    Parse a YAML file.
+
+    PyYAML is imported here rather than at module level, so importing this module stays cheap.
+
+    Args:
+        path: Path to the YAML file
+
+    Returns:
+        The parsed content
+    """
+    import yaml
+
+    # Use the libyaml-backed loader when PyYAML was built with it
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=Loader)
+
+
+def list_audio_files(directory: str) -> List[Track]:
+    """
+    List the audio files in a directory, using a cached listing when the directory is unchanged.
+
+    Args:
+        directory: Directory to list
+
+    Returns:
+        List of tracks, sorted by name. The list is cached and must not be modified.
+
+    Raises:
+        FileNotFoundError: If the directory does not exist
+    """
+    return _listing_cache.get(directory)
+
+
 class Playlist:
     """Class representing a playlist."""
 
@@ -30,6 +145,11 @@ class Playlist:
         self.directory = directory
         self.current_track_index = 0
 
+        # Resolved track paths, reused until base_dir or the directory listing changes
+        self._resolved: Optional[List[str]] = None
+        self._resolved_base_dir: Optional[str] = None
+        self._resolved_listing: Optional[List[Track]] = None
+
     def get_tracks(self, base_dir: str = "") -> List[str]:
         """
         Get all tracks in the playlist.
@@ -38,31 +158,29 @@ class Playlist:
             base_dir: Base directory for relative paths
 
         Returns:
-            List of track paths
+            List of track paths. The list is cached on the playlist and must not be modified.
         """
         if self.tracks:
-            # Return the explicitly defined tracks
-            return [os.path.join(base_dir, track) if not os.path.isabs(track) else track 
-                   for track in self.tracks]
+            # Return the explicitly defined tracks, which only need to be joined once per base directory
+            if self._resolved is None or self._resolved_base_dir != base_dir:
+                self._resolved = [os.path.join(base_dir, track) if not os.path.isabs(track) else track
+                                  for track in self.tracks]
+                self._resolved_base_dir = base_dir
+            return self._resolved
         elif self.directory:
             # Get all audio files in the directory in alphabetical order
             directory_path = os.path.join(base_dir, self.directory) if not os.path.isabs(self.directory) else self.directory
-            if not os.path.exists(directory_path):
-                logger.warning(f"Playlist directory not found: {directory_path}")
+            try:
+                listing = list_audio_files(directory_path)
+            except FileNotFoundError:
+                logger.warning("Playlist directory not found: %s", directory_path)
                 return []
 
-            # Look for common audio file formats
-            audio_extensions = ['.mp3', '.wav', '.ogg', '.flac']
-            tracks = []
-
-            for file in sorted(os.listdir(directory_path)):
-                file_path = os.path.join(directory_path, file)
-                if os.path.isfile(file_path):
-                    _, ext = os.path.splitext(file)
-                    if ext.lower() in audio_extensions:
-                        tracks.append(file_path)
-
-            return tracks
+            # The listing cache hands out the same list for as long as the directory's mtime is unchanged
+            if listing is not self._resolved_listing:
+                self._resolved = [track.path for track in listing]
+                self._resolved_listing = listing
+            return self._resolved
         else:
             return []
 
@@ -80,18 +198,40 @@ class Playlist:
         if not tracks:
             return None
 
-        # Get the current track
-        track = tracks[self.current_track_index]
+        # Get the current track. The playlist may have shrunk since the index was advanced.
+        index = self.current_track_index % len(tracks)
+        track = tracks[index]
 
         # Increment the index for next time, looping back to 0 if we reach the end
-        self.current_track_index = (self.current_track_index + 1) % len(tracks)
+        self.current_track_index = (index + 1) % len(tracks)
 
         return track
 
+    def peek_next_track(self, base_dir: str = "") -> Optional[str]:
+        """
+        Get the track that get_next_track would return, without advancing the playlist.
+
+        Args:
+            base_dir: Base directory for relative paths
+
+        Returns:
+            Path to the next track, or None if the playlist is empty
+        """
+        tracks = self.get_tracks(base_dir)
+        if not tracks:
+            return None
+        return tracks[self.current_track_index % len(tracks)]
+
     def reset(self) -> None:
         """Reset the playlist to the beginning."""
         self.current_track_index = 0
 
+    def invalidate(self) -> None:
+        """Forget the resolved track paths, so they are looked up again the next time they are needed."""
+        self._resolved = None
+        self._resolved_base_dir = None
+        self._resolved_listing = None
+
 
 class MusicConfig:
     """Class for managing music configuration."""
@@ -110,6 +250,19 @@ class MusicConfig:
         self.schedules: List[Dict[str, Any]] = []
         self.default_playlist: Optional[Playlist] = None
 
+        # Schedules compiled into lookup tables: one slot per hour of the week, and one list of 24 slots per date
+        self._weekly: List[Optional[Playlist]] = [None] * (7 * 24)
+        self._dated: Dict[str, List[Optional[Playlist]]] = {}
+
+        # The playlist only changes from hour to hour, so remember the result per (date, day, hour)
+        self._resolve_playlist_cached = lru_cache(maxsize=32)(self._resolve_playlist)
+
+        # The current (date, day, hour) and the wall clock interval in which it holds, so the clock
+        # only needs to be broken down into calendar fields once per hour
+        self._slot: Optional[Tuple[str, int, int]] = None
+        self._slot_start = 0.0
+        self._slot_end = 0.0
+
     def load(self) -> bool:
         """
         Load the configuration from the YAML file.
@@ -117,13 +270,24 @@ class MusicConfig:
         Returns:
             bool: True if loading was successful, False otherwise
         """
-        if not os.path.exists(self.config_path):
-            logger.warning(f"Configuration file not found: {self.config_path}")
-            return False
-
         try:
-            with open(self.config_path, 'r') as f:
-                config = yaml.safe_load(f)
+            cache_key = os.path.abspath(self.config_path)
+            try:
+                mtime = os.stat(self.config_path).st_mtime_ns
+            except FileNotFoundError:
+                logger.warning("Configuration file not found: %s", self.config_path)
+                return False
+            cached = _CONFIG_CACHE.get(cache_key)
+            if cached is not None and cached[0] == mtime:
+                config = cached[1]
+            else:
+                config = _load_yaml(self.config_path)
+                _CONFIG_CACHE[cache_key] = (mtime, config)
+
+            # Playlists from a previous load may still be in use, so make them pick up changes on disk
+            for playlist in self.playlists.values():
+                playlist.invalidate()
+            _listing_cache.clear()
 
             # Parse playlists
             if 'playlists' in config:
@@ -140,14 +304,48 @@ class MusicConfig:
             # Parse schedules
             if 'schedules' in config:
                 self.schedules = config['schedules']
+            self._compile_schedules()
 
-            logger.info(f"Loaded configuration from {self.config_path}")
-            logger.info(f"Found {len(self.playlists)} playlists and {len(self.schedules)} schedules")
+            logger.info("Loaded configuration from %s", self.config_path)
+            logger.info("Found %s playlists and %s schedules", len(self.playlists), len(self.schedules))
             return True
         except Exception as e:
-            logger.error(f"Error loading configuration: {e}")
+            logger.error("Error loading configuration: %s", e)
             return False
 
+    def _compile_schedules(self) -> None:
+        """
+        Compile the schedules into lookup tables so finding the current playlist doesn't need to scan them.
+
+        Date-specific schedules take precedence over day-of-week schedules. Within each kind, the first
+        schedule listed for a slot wins. Schedules referring to an unknown playlist are ignored.
+        """
+        self._weekly = [None] * (7 * 24)
+        self._dated = {}
+        self._resolve_playlist_cached.cache_clear()
+
+        for schedule in self.schedules:
+            playlist = self.playlists.get(schedule.get('playlist'))
+            if playlist is None:
+                continue
+            hours = [hour for hour in schedule.get('hours', []) if isinstance(hour, int) and 0 <= hour < 24]
+
+            # Check date-specific schedule (YAML parses unquoted dates, so normalize them to strings)
+            if 'date' in schedule:
+                slots = self._dated.setdefault(str(schedule['date']), [None] * 24)
+                for hour in hours:
+                    if slots[hour] is None:
+                        slots[hour] = playlist
+
+            # Check day-of-week schedule
+            if 'days' in schedule:
+                for day in schedule['days']:
+                    if not (isinstance(day, int) and 0 <= day < 7):
+                        continue
+                    for hour in hours:
+                        if self._weekly[day * 24 + hour] is None:
+                            self._weekly[day * 24 + hour] = playlist
+
     def get_playlist(self, name: str) -> Optional[Playlist]:
         """
         Get a playlist by name.
@@ -160,35 +358,66 @@ class MusicConfig:
         """
         return self.playlists.get(name)
 
-    def get_current_playlist(self) -> Optional[Playlist]:
+    def get_current_playlist(self, now: Optional[datetime] = None) -> Optional[Playlist]:
         """
         Get the playlist that should be active based on the current time.
 
+        Args:
+            now: Time to get the playlist for. If None, the current local time is used.
+
         Returns:
             Playlist object, or None if no playlist is scheduled
         """
-        now = datetime.now()
-        current_day = now.weekday()  # 0 = Monday, 6 = Sunday
-        current_hour = now.hour
-        current_date = now.strftime("%Y-%m-%d")
+        if now is not None:
+            return self._resolve_playlist_cached(*self._time_slot(now))
 
-        # Check each schedule
-        for schedule in self.schedules:
-            # Check date-specific schedule
-            if 'date' in schedule and schedule['date'] == current_date:
-                if 'hours' in schedule and current_hour in schedule['hours']:
-                    playlist_name = schedule.get('playlist')
-                    if playlist_name and playlist_name in self.playlists:
-                        logger.debug(f"Using date-specific playlist: {playlist_name}")
-                        return self.playlists[playlist_name]
+        wall_clock = time()
+        if self._slot is None or not self._slot_start <= wall_clock < self._slot_end:
+            now = datetime.fromtimestamp(wall_clock)
+            hour_start = now.replace(minute=0, second=0, microsecond=0)
+            self._slot = self._time_slot(now)
+            self._slot_start = hour_start.timestamp()
+            self._slot_end = (hour_start + timedelta(hours=1)).timestamp()
 
-            # Check day-of-week schedule
-            if 'days' in schedule and current_day in schedule['days']:
-                if 'hours' in schedule and current_hour in schedule['hours']:
-                    playlist_name = schedule.get('playlist')
-                    if playlist_name and playlist_name in self.playlists:
-                        logger.debug(f"Using day-of-week playlist: {playlist_name}")
-                        return self.playlists[playlist_name]
+        return self._resolve_playlist_cached(*self._slot)
+
+    @staticmethod
+    def _time_slot(now: datetime) -> Tuple[str, int, int]:
+        """
+        Get the schedule slot a time falls in.
+
+        Args:
+            now: The time
+
+        Returns:
+            Tuple of the date in YYYY-MM-DD format, the day of the week (0 = Monday, 6 = Sunday) and the hour
+        """
+        # Formatting the fields directly is considerably faster than strftime
+        return f"{now.year:04d}-{now.month:02d}-{now.day:02d}", now.weekday(), now.hour
+
+    def _resolve_playlist(self, current_date: str, current_day: int, current_hour: int) -> Optional[Playlist]:
+        """
+        Get the playlist scheduled for an hour.
+
+        Args:
+            current_date: Date in YYYY-MM-DD format
+            current_day: Day of the week (0 = Monday, 6 = Sunday)
+            current_hour: Hour of the day (0-23)
+
+        Returns:
+            Playlist object, or None if no playlist is scheduled
+        """
+        # Check date-specific schedules
+        dated = self._dated.get(current_date)
+        if dated is not None and dated[current_hour] is not None:
+            logger.debug("Using date-specific playlist: %s", dated[current_hour].name)
+            return dated[current_hour]
+
+        # Check day-of-week schedules
+        playlist = self._weekly[current_day * 24 + current_hour]
+        if playlist is not None:
+            logger.debug("Using day-of-week playlist: %s", playlist.name)
+            return playlist
 
         # If no schedule matches, return the default playlist
         if self.default_playlist:
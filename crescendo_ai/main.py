@@ -11,25 +11,53 @@ when no presence is detected.
 """
 
 import logging
+import logging.handlers
+import queue
+from collections import deque
 import time
 import os
+from typing import Optional
 
 from crescendo_ai.sensor import PresenceSensor
 from crescendo_ai.relay import USBRelay
 from crescendo_ai.audio import AudioPlayer
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('crescendo.log')
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
+
+def configure_logging(log_file: str = 'crescendo.log') -> Optional[logging.handlers.QueueListener]:
+    """
+    Configure logging to the console and to a log file.
+
+    Log records are passed through a queue to a background thread that writes them, so logging never
+    makes the main loop wait for the SD card. Does nothing if logging was already configured.
+
+    Args:
+        log_file: Path to the log file
+
+    Returns:
+        Optional[QueueListener]: The started listener that writes the records, which should be stopped
+        on exit to flush them, or None if logging was already configured
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root.setLevel(logging.DEBUG)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler)
+    listener.start()
+    return listener
+
+
 class CrescendoSystem:
     """Main class that coordinates all components of the Crescendo AI system."""
 
@@ -47,7 +75,7 @@ class CrescendoSystem:
         Args:
             sensor_port: Serial port for the presence sensor
             music_dir: Directory containing music files
-            check_interval: Interval in seconds between presence checks
+            check_interval: Interval in seconds between presence checks while motion is detected or music is playing
             relay_off_delay: Delay in seconds before turning off the relay after no presence is detected
             config_path: Path to the music configuration file. If None, will look for music_config.yaml in music_dir.
         """
@@ -63,13 +91,22 @@ class CrescendoSystem:
         self.audio_player = AudioPlayer(music_dir=music_dir, config_path=self.config_path)
 
         # State variables
+        # Timestamps are taken from the monotonic clock, which doesn't jump when the wall clock is adjusted.
+        # The offset converts them to wall clock time for logging.
+        self._wall_clock_offset = time.time() - time.monotonic()
+
         self.running = False
         self.last_presence_time = None
 
+        # Target status changes reported by the sensor's read thread, which wake up the main loop
+        self._sensor_events: queue.Queue = queue.Queue()
+
         # Dynamic detection state variables
-        self.dynamic_detection_history = []  # List of timestamps when dynamic motion was detected
+        self.dynamic_detection_history = deque(maxlen=64)  # Timestamps when dynamic motion was detected, oldest first
         self.dynamic_detection_active_until = None  # Timestamp until dynamic detection is considered active
         self.dynamic_detection_duration = 300  # Duration in seconds (5 minutes) to keep dynamic detection active
+        self.continuous_detection_window = 3.0  # Window in seconds in which motion must be seen to be continuous
+        self.continuous_detection_count = 3  # Number of checks in the window that must have seen motion
 
         # State tracking for logging
         self.prev_dynamic_detection_active = False
@@ -87,9 +124,7 @@ class CrescendoSystem:
         logger.info("Initializing Crescendo system...")
 
         # Create music directory if it doesn't exist
-        if not os.path.exists(self.music_dir):
-            logger.info(f"Creating music directory: {self.music_dir}")
-            os.makedirs(self.music_dir)
+        os.makedirs(self.music_dir, exist_ok=True)
 
         # Initialize sensor
         sensor_ok = self.sensor.connect()
@@ -109,8 +144,9 @@ class CrescendoSystem:
             if not config_ok:
                 logger.warning("Failed to configure sensor - continuing with default configuration")
         except Exception as e:
-            logger.warning(f"Error configuring sensor: {e} - continuing with default configuration")
+            logger.warning("Error configuring sensor: %s - continuing with default configuration", e)
 
+        self.sensor.set_state_callback(self._sensor_events.put)
         self.sensor.start_reading()
 
         # Initialize relay
@@ -155,65 +191,122 @@ class CrescendoSystem:
 
         try:
             while self.running:
-                self._check_presence_and_update()
-                time.sleep(self.check_interval)
+                self.step()
+                self._wait_for_sensor_event(self._next_timeout())
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt received")
         except Exception as e:
-            logger.error(f"Error in main loop: {e}", exc_info=True)
+            logger.error("Error in main loop: %s", e, exc_info=True)
         finally:
             self.shutdown()
 
-    def _check_presence_and_update(self) -> None:
-        """Check for presence and update system state accordingly using the robust detection algorithm."""
+    def stop(self) -> None:
+        """Stop the main loop. Can be called from another thread."""
+        self.running = False
+        # Wake up the main loop if it is waiting for the sensor
+        self._sensor_events.put(None)
+
+    def step(self) -> None:
+        """Run one iteration of the main loop: check for presence and update the relay and the music."""
+        self._check_presence_and_update()
+
+    def _wait_for_sensor_event(self, timeout: Optional[float]) -> None:
+        """
+        Wait until the sensor reports a change of the target status.
+
+        Args:
+            timeout: Maximum time to wait in seconds, or None to wait indefinitely
+        """
         try:
-            current_time = time.time()
+            self._sensor_events.get(timeout=timeout)
+        except queue.Empty:
+            return
 
-            # Check for dynamic (moving) target
-            dynamic_detected = self.sensor.is_moving_target_detected()
+        # Several changes may have been reported since the last check, one check handles them all
+        try:
+            while True:
+                self._sensor_events.get_nowait()
+        except queue.Empty:
+            pass
 
-            # Update dynamic detection history
-            if dynamic_detected:
-                self.dynamic_detection_history.append(current_time)
+    def _next_timeout(self) -> Optional[float]:
+        """
+        Get how long the main loop can wait for the sensor before the state has to be checked again anyway.
 
-            # Remove entries older than 3 seconds from history
-            self.dynamic_detection_history = [t for t in self.dynamic_detection_history 
-                                             if current_time - t <= 3.0]
+        Returns:
+            Optional[float]: Time in seconds, or None if nothing changes until the sensor reports a change
+        """
+        # Continuous motion is counted over several checks, and the end of a track has to be noticed
+        if (self.dynamic_detection_history or self.sensor.is_moving_target_detected()
+                or self.audio_player.is_playing()):
+            return self.check_interval
 
-            # Check if we have continuous dynamic detection for 3 seconds
-            dynamic_detection_active = False
-            continuous_detection = len(self.dynamic_detection_history) >= 3
-
-            if continuous_detection:
-                # If we have at least 3 detections in the last 3 seconds, activate dynamic detection
-                dynamic_detection_active = True
-                # Set the dynamic detection to be active for the next 5 minutes
-                self.dynamic_detection_active_until = current_time + self.dynamic_detection_duration
-                # Log only if this is a new continuous detection
-                if not self.prev_continuous_detection:
-                    logger.debug(f"Dynamic detection activated: continuous motion detected for 3+ seconds (active until {time.ctime(self.dynamic_detection_active_until)})")
-                    self.prev_continuous_detection = True
-            elif self.dynamic_detection_active_until and current_time < self.dynamic_detection_active_until:
-                # Dynamic detection is still active from a previous detection
-                dynamic_detection_active = True
-                # No need to log this every second - it's redundant information
-            else:
-                # Log only if dynamic detection was previously active
-                if self.prev_dynamic_detection_active:
-                    logger.debug(f"Dynamic detection inactive: no continuous motion detected and not within 5-minute window")
-                self.prev_continuous_detection = False
+        # Otherwise only the relay's delayed turn off is time-based
+        if self.last_presence_time is not None and self.relay.is_connected() and self.relay.is_turned_on():
+            remaining = self.last_presence_time + self.relay_off_delay - time.monotonic()
+            return max(remaining, 0.0) + self.check_interval
 
-            # Check for static target
-            static_detected = self.sensor.is_static_target_detected()
+        return None
 
-            # Reset dynamic detection if no static target is detected
+    def _check_presence_and_update(self) -> None:
+        """Check for presence and update system state accordingly using the robust detection algorithm."""
+        try:
+            current_time = time.monotonic()
+            sensor = self.sensor
+            relay = self.relay
+            audio_player = self.audio_player
+            # Arguments that need work to compute are only computed when debug logging is enabled
+            debug = logger.isEnabledFor(logging.DEBUG)
+
+            # Read both targets from the same sensor report
+            snapshot = sensor.snapshot()
+            dynamic_detected = snapshot.moving
+            static_detected = snapshot.static
+
+            # Without a static target there can be no robust presence, so the motion history doesn't matter
+            dynamic_detection_active = False
+            continuous_detection = False
             if not static_detected:
-                # Only log if this is a change from the previous state
+                # Reset dynamic detection, only logging if this is a change from the previous state
                 if self.dynamic_detection_active_until is not None:
                     logger.debug("Resetting dynamic detection because no static target is detected")
-                self.dynamic_detection_history = []
+                self.dynamic_detection_history.clear()
                 self.dynamic_detection_active_until = None
-                dynamic_detection_active = False
+                self.prev_continuous_detection = False
+            else:
+                # Update dynamic detection history
+                if dynamic_detected:
+                    self.dynamic_detection_history.append(current_time)
+
+                # Remove entries older than the window from history, which are all at its start
+                history = self.dynamic_detection_history
+                cutoff = current_time - self.continuous_detection_window
+                while history and history[0] < cutoff:
+                    history.popleft()
+
+                # Check if we have continuous dynamic detection for the whole window
+                continuous_detection = len(history) >= self.continuous_detection_count
+
+                if continuous_detection:
+                    # If we have enough detections within the window, activate dynamic detection
+                    dynamic_detection_active = True
+                    # Set the dynamic detection to be active for the next 5 minutes
+                    self.dynamic_detection_active_until = current_time + self.dynamic_detection_duration
+                    # Log only if this is a new continuous detection
+                    if not self.prev_continuous_detection:
+                        if debug:
+                            logger.debug("Dynamic detection activated: continuous motion detected for %g+ seconds (active until %s)",
+                                         self.continuous_detection_window, time.ctime(self.dynamic_detection_active_until + self._wall_clock_offset))
+                        self.prev_continuous_detection = True
+                elif self.dynamic_detection_active_until and current_time < self.dynamic_detection_active_until:
+                    # Dynamic detection is still active from a previous detection
+                    dynamic_detection_active = True
+                    # No need to log this every second - it's redundant information
+                else:
+                    # Log only if dynamic detection was previously active
+                    if self.prev_dynamic_detection_active:
+                        logger.debug("Dynamic detection inactive: no continuous motion detected and not within 5-minute window")
+                    self.prev_continuous_detection = False
 
             # Update previous dynamic detection state
             if dynamic_detection_active != self.prev_dynamic_detection_active:
@@ -222,9 +315,9 @@ class CrescendoSystem:
             # Log static detection status only if it changed
             if static_detected != self.prev_static_detected:
                 if static_detected:
-                    logger.debug(f"Static target detected: energy level {self.sensor.get_static_energy()}")
+                    logger.debug("Static target detected: energy level %s", snapshot.static_energy)
                 else:
-                    logger.debug(f"No static target detected")
+                    logger.debug("No static target detected")
                 self.prev_static_detected = static_detected
 
             # Robust presence detection: both dynamic detection must be active AND static target must be detected
@@ -239,22 +332,25 @@ class CrescendoSystem:
                 # Log detailed presence detection information
                 if not self.prev_presence_detected:
                     logger.info("PRESENCE DETECTED: Both conditions met for robust detection")
-                    logger.info(f"  - Dynamic detection: {'Continuous motion for 3+ seconds' if continuous_detection else 'Within 5-minute window'}")
-                    logger.info(f"  - Static detection: Energy level {self.sensor.get_static_energy()}")
+                    if continuous_detection:
+                        logger.info("  - Dynamic detection: Continuous motion for %g+ seconds", self.continuous_detection_window)
+                    else:
+                        logger.info("  - Dynamic detection: Within 5-minute window")
+                    logger.info("  - Static detection: Energy level %s", snapshot.static_energy)
 
                 # If music is not playing, turn on relay and start music
-                if self.relay.is_connected() and not self.relay.is_turned_on():
+                if relay.is_connected() and not relay.is_turned_on():
                     logger.info("Robust presence detected - turning on relay")
                     # Turn on the relay (speaker power)
-                    self.relay.turn_on()
+                    relay.turn_on()
 
-                if not self.audio_player.is_playing():
+                if not audio_player.is_playing():
                     logger.info("Robust presence detected - starting music")
                     # Start playing music using the configured playlist system
-                    self.audio_player.play()
+                    audio_player.play()
                 else:
                     # Check if the current track has ended and play the next track if needed
-                    self.audio_player.check_for_track_end()
+                    audio_player.check_for_track_end()
 
                 # Update previous presence state
                 self.prev_presence_detected = True
@@ -272,24 +368,24 @@ class CrescendoSystem:
 
                 # Regular debug logging - only log if state changed
                 if dynamic_detection_active != self.prev_dynamic_detection_active or static_detected != self.prev_static_detected:
-                    logger.debug(f"No robust presence - Dynamic: {dynamic_detection_active}, Static: {static_detected}")
+                    logger.debug("No robust presence - Dynamic: %s, Static: %s", dynamic_detection_active, static_detected)
 
                 # If no robust presence is detected and music is playing, stop it
-                if self.audio_player.is_playing():
+                if audio_player.is_playing():
                     logger.info("No robust presence detected - stopping music")
                     # Stop music
-                    self.audio_player.stop()
+                    audio_player.stop()
 
                 relay_timeout_is_complete = (self.last_presence_time is not None and 
                                            current_time - self.last_presence_time > self.relay_off_delay)
 
                 # Turn off the relay (speaker power) after the delay
-                if self.relay.is_connected() and self.relay.is_turned_on() and relay_timeout_is_complete:
-                    logger.info(f"Turning off relay after {int(self.relay_off_delay/60)} minutes of no presence")
-                    self.relay.turn_off()
+                if relay.is_connected() and relay.is_turned_on() and relay_timeout_is_complete:
+                    logger.info("Turning off relay after %d minutes of no presence", int(self.relay_off_delay/60))
+                    relay.turn_off()
 
         except Exception as e:
-            logger.error(f"Error checking presence: {e}")
+            logger.error("Error checking presence: %s", e)
 
 
 def main():
@@ -300,7 +396,7 @@ def main():
     parser = argparse.ArgumentParser(description="Crescendo AI - Presence-activated music player")
     parser.add_argument('--sensor-port', default='/dev/ttyAMA0', help='Serial port for the presence sensor')
     parser.add_argument('--music-dir', default='music', help='Directory containing music files')
-    parser.add_argument('--check-interval', type=float, default=1.0, help='Interval in seconds between presence checks')
+    parser.add_argument('--check-interval', type=float, default=1.0, help='Interval in seconds between presence checks while motion is detected or music is playing')
     parser.add_argument('--relay-off-delay', type=float, default=15.0 * 60.0, 
                         help='Delay in seconds before turning off the relay after no presence is detected (default: 15 minutes)')
     parser.add_argument('--config-path', default=None, 
@@ -308,6 +404,8 @@ def main():
 
     args = parser.parse_args()
 
+    log_listener = configure_logging()
+
     # Create and run the system
     system = CrescendoSystem(
         sensor_port=args.sensor_port,
@@ -317,7 +415,11 @@ def main():
         config_path=args.config_path
     )
 
-    system.run()
+    try:
+        system.run()
+    finally:
+        if log_listener is not None:
+            log_listener.stop()
 
 
 if __name__ == "__main__":
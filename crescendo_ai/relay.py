@@ -2,6 +2,7 @@
 
 import hid
 import logging
+from typing import Dict
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +12,13 @@ class USBRelay:
     # Default USB relay vendor and product IDs
     DEFAULT_VENDOR_ID = 0x16c0
     DEFAULT_PRODUCT_ID = 0x05df
+
+    # Report commands
+    CMD_ON = 0xFF
+    CMD_OFF = 0xFD
+
+    # Channels of the supported relay boards, which have up to 8 relays
+    CHANNELS = range(1, 9)
     
     def __init__(self, vendor_id: int = DEFAULT_VENDOR_ID, product_id: int = DEFAULT_PRODUCT_ID):
         """
@@ -25,6 +33,9 @@ class USBRelay:
         self._device = None
         self._is_connected = False
         self.turned_on = False
+        # Reports sent to the device per channel, starting with the report ID
+        self._on_reports: Dict[int, bytes] = {channel: bytes([0x00, self.CMD_ON, channel]) for channel in self.CHANNELS}
+        self._off_reports: Dict[int, bytes] = {channel: bytes([0x00, self.CMD_OFF, channel]) for channel in self.CHANNELS}
         
     def connect(self) -> bool:
         """
@@ -59,7 +70,8 @@ class USBRelay:
         Returns:
             bool: True if connected, False otherwise
         """
-        return self._is_connected and self._device is not None
+        # connect() and disconnect() keep the flag in sync with the device
+        return self._is_connected
     
     def turn_on(self, channel: int = 1) -> bool:
         """
@@ -76,11 +88,13 @@ class USBRelay:
             return False
 
         try:
-            cmd = bytes([0x00, 0xFF, channel])
-            self._device.write(cmd)
+            self._device.write(self._on_reports[channel])
             self.turned_on = True
             logger.info(f"Turned ON relay channel {channel}")
             return True
+        except KeyError:
+            logger.error(f"Cannot turn on relay: Unknown channel {channel}")
+            return False
         except Exception as e:
             logger.error(f"Error turning on relay: {e}")
             return False
@@ -100,11 +114,13 @@ class USBRelay:
             return False
             
         try:
-            cmd = bytes([0x00, 0xFD, channel])
-            self._device.write(cmd)
+            self._device.write(self._off_reports[channel])
             self.turned_on = False
             logger.info(f"Turned OFF relay channel {channel}")
             return True
+        except KeyError:
+            logger.error(f"Cannot turn off relay: Unknown channel {channel}")
+            return False
         except Exception as e:
             logger.error(f"Error turning off relay: {e}")
             return False
@@ -116,4 +132,4 @@ class USBRelay:
         Returns:
             bool: True if the relay is on, False otherwise
         """
-        return self.turned_on
\ No newline at end of file
+        return self.turned_on
@@ -10,10 +10,33 @@ import struct
 import time
 import logging
 import threading
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple, Callable
 
 logger = logging.getLogger(__name__)
 
+# Precompiled formats of the protocol's little endian fields
+_U16 = struct.Struct('<H')
+# Three (parameter word, value) pairs, as used by the distance and sensitivity commands
+_PARAMETERS = struct.Struct('<HIHIHI')
+_U8_PAIR = struct.Struct('<BB')
+# Distance of each gate in metres, at the default 0.75m per gate
+_GATE_DISTANCES = tuple(i * 0.75 for i in range(8))
+# Target status, moving distance/energy, static distance/energy, detection distance
+_TARGET = struct.Struct('<BHBHBH')
+# ACK command word and status
+_ACK = struct.Struct('<HH')
+# Command frame header, data length and command word
+_COMMAND_PREFIX = struct.Struct('<4sHH')
+
+
+class SensorSnapshot(NamedTuple):
+    """The targets reported by the sensor at one moment."""
+
+    moving: bool
+    static: bool
+    static_energy: int
+
+
 class PresenceSensor:
     """Class to interface with the 24GHz mmWave Human Static Presence Sensor."""
 
@@ -24,13 +47,13 @@ class PresenceSensor:
     DATA_FRAME_HEADER = b'\xF4\xF3\xF2\xF1'
     DATA_FRAME_FOOTER = b'\xF8\xF7\xF6\xF5'
 
-    # Target state definitions
-    TARGET_STATES = {
-        0x00: "No target",
-        0x01: "Moving target",
-        0x02: "Stationary target",
-        0x03: "Moving & Stationary target"
-    }
+    # Target state definitions, indexed by target status
+    TARGET_STATES = (
+        "No target",  # 0x00
+        "Moving target",  # 0x01
+        "Stationary target",  # 0x02
+        "Moving & Stationary target"  # 0x03
+    )
 
     # Data type definitions
     DATA_TYPES = {
@@ -44,6 +67,9 @@ class PresenceSensor:
     CMD_SET_DISTANCE_PARAMS = 0x0060
     CMD_SET_SENSITIVITY = 0x0064
 
+    # Upper bound on the data length of frames, to resynchronize quickly on a corrupted length
+    MAX_FRAME_LENGTH = 64
+
     def __init__(self, port: str = '/dev/ttyAMA0', baudrate: int = 256000, timeout: float = 1.0):
         """
         Initialize the presence sensor.
@@ -58,13 +84,18 @@ class PresenceSensor:
         self.timeout = timeout
         self._serial: Optional[serial.Serial] = None
         self._is_connected = False
+        # Replaced as a whole for every frame and never mutated, so readers can
+        # take a reference without locking
         self._last_data: Dict[str, Any] = {}
 
         # Thread-related attributes
         self._read_thread: Optional[threading.Thread] = None
         self._thread_running = False
+        # Set to wake the read thread from its error back-off when it's stopped
+        self._stop_event = threading.Event()
         self._presence_detected = False
-        self._thread_lock = threading.Lock()
+        # Called from the read thread with the new target status whenever it changes
+        self._state_callback: Optional[Callable[[int], None]] = None
 
     def connect(self) -> bool:
         """
@@ -108,6 +139,7 @@ class PresenceSensor:
             return
 
         self._thread_running = True
+        self._stop_event.clear()
         self._read_thread = threading.Thread(
             target=self._read_thread_func,
             daemon=True,
@@ -115,12 +147,24 @@ class PresenceSensor:
         )
         self._read_thread.start()
 
+    def set_state_callback(self, callback: Optional[Callable[[int], None]]) -> None:
+        """
+        Set a function to call when the target status reported by the sensor changes.
+
+        The callback is called from the reading thread, so it should return quickly.
+
+        Args:
+            callback: Function taking the new target status (see TARGET_STATES), or None to remove it
+        """
+        self._state_callback = callback
+
     def _stop_read_thread(self) -> None:
         """Stop the continuous reading thread."""
         if self._read_thread is None or not self._thread_running:
             return
 
         self._thread_running = False
+        self._stop_event.set()
         if self._read_thread.is_alive():
             self._read_thread.join(timeout=2.0)  # Wait up to 2 seconds for thread to end
         self._read_thread = None
@@ -129,20 +173,28 @@ class PresenceSensor:
     def _read_thread_func(self) -> None:
         """Thread function that continuously reads from the sensor."""
         logger.debug("Sensor read thread started")
+        last_status = None
 
         while self._thread_running and self.is_connected():
             try:
                 data = self.read_data()
 
-                # Update the presence state with thread safety
-                with self._thread_lock:
-                    self._presence_detected = bool(data.get('presence', False))
+                # A single attribute store, so readers never see a partial update
+                self._presence_detected = bool(data.get('presence', False))
+
+                # Notify about changes of the target status
+                status = data.get('target_status', 0)
+                if status != last_status:
+                    last_status = status
+                    callback = self._state_callback
+                    if callback is not None:
+                        callback(status)
 
             except Exception as e:
                 logger.error(f"Error in sensor read thread: {e}")
-
-            # Small delay to prevent excessive CPU usage
-            time.sleep(0.1)
+                # Don't spin if the error repeats, but stop right away when asked to
+                if self._stop_event.wait(0.1):
+                    break
 
         logger.debug("Sensor read thread ended")
 
@@ -153,7 +205,8 @@ class PresenceSensor:
         Returns:
             bool: True if connected, False otherwise
         """
-        return self._is_connected and self._serial and self._serial.is_open
+        # connect() and disconnect() keep the flag in sync with the port
+        return self._is_connected
 
     def read_data(self) -> Dict[str, Any]:
         """
@@ -167,7 +220,7 @@ class PresenceSensor:
             return {}
 
         # Parse the frame
-        parsed_data = self._parse_data_frame(*self._read_frame(self.DATA_FRAME_HEADER, self.DATA_FRAME_FOOTER))
+        parsed_data = self._parse_data_frame(self._read_frame(self.DATA_FRAME_HEADER, self.DATA_FRAME_FOOTER))
 
         if parsed_data:
             self._last_data = parsed_data
@@ -177,103 +230,74 @@ class PresenceSensor:
         # Return the last successful data or empty dict
         return self._last_data if self._last_data else {}
 
-    def _read_frame(self, frame_header: bytes, frame_footer: bytes, delay_read = True) -> Tuple[bytes, int]:
+    def _read_frame(self, frame_header: bytes, frame_footer: bytes) -> bytes:
         """
         Read frame from the sensor.
 
+        Every read blocks until the bytes it asks for have arrived or the serial timeout expires,
+        so no time is spent polling the port.
+
         Returns:
-            Tuple[bytes, int]: frame data and frame length
+            bytes: The frame's data, between the length and the footer, or empty bytes if no valid frame arrived
         """
         if not self.is_connected():
             logger.error("Cannot read frame: Sensor not connected")
-            return b'', 0
+            return b''
 
         try:
-            buffer = b''
-            start_time = time.time()
+            deadline = time.monotonic() + self.timeout
 
             # Try to read a complete frame with timeout
-            while time.time() - start_time < self.timeout:
-                if self._serial.in_waiting > 0:
-                    data = self._serial.read(self._serial.in_waiting)
-                    buffer += data
-
-                    # Process complete frames
-                    while len(buffer) >= 4:
-                        # Look for frame header
-                        header_pos = buffer.find(frame_header)
-                        if header_pos == -1:
-                            # No header found, keep last 3 bytes in case header is split
-                            buffer = buffer[-3:] if len(buffer) > 3 else buffer
-                            break
-
-                        # Remove data before header
-                        if header_pos > 0:
-                            buffer = buffer[header_pos:]
-
-                        # Check if we have enough data for frame length
-                        if len(buffer) < 6:
-                            break
-
-                        # Extract frame length (2 bytes after header, little endian)
-                        frame_length = struct.unpack('<H', buffer[4:6])[0]
-                        total_frame_size = 4 + 2 + frame_length + 4  # header + length + data + footer
-
-                        # Check if we have complete frame
-                        if len(buffer) < total_frame_size:
-                            break
-
-                        # Extract frame
-                        frame = buffer[:total_frame_size]
-
-                        # Verify frame footer
-                        if frame[-4:] != frame_footer:
-                            logger.debug("Invalid frame footer in read_data")
-                            # Skip this frame and continue looking
-                            buffer = buffer[4:]  # Skip the header and continue
-                            continue
-
-                        # Parse the frame
-                        return frame, frame_length
-
-                if delay_read:
-                    # Small delay to prevent excessive CPU usage
-                    time.sleep(0.01)
+            while time.monotonic() < deadline:
+                # Skip to the end of the next frame header
+                if not self._serial.read_until(frame_header).endswith(frame_header):
+                    break
+
+                # Extract frame length (2 bytes after header, little endian)
+                length_bytes = self._serial.read(2)
+                if len(length_bytes) < 2:
+                    break
+                frame_length = _U16.unpack(length_bytes)[0]
+                if frame_length > self.MAX_FRAME_LENGTH:
+                    # Not a real frame: the header bytes were part of something else
+                    logger.debug("Invalid frame length in read_data: %d", frame_length)
+                    continue
+
+                # Read the data and the footer
+                rest = self._serial.read(frame_length + 4)
+                if len(rest) < frame_length + 4:
+                    break
+
+                # Verify frame footer
+                if not rest.endswith(frame_footer):
+                    logger.debug("Invalid frame footer in read_data")
+                    # Skip this frame and continue looking
+                    continue
+
+                # The header and footer have been checked here, so only the data is passed on
+                return rest[:frame_length]
 
             # If we got here, we didn't get a complete frame
-            # Return the last successful data or empty dict
-            return b'', 0
+            return b''
 
         except Exception as e:
             logger.error(f"Error reading from sensor: {e}")
-            return b'', 0
+            # A failing port fails again right away, so back off before the read thread retries,
+            # but stop right away when asked to
+            self._stop_event.wait(0.1)
+            return b''
 
-    def _parse_data_frame(self, frame: bytes, data_length: int) -> Dict[str, Any]:
+    def _parse_data_frame(self, data_portion: bytes) -> Dict[str, Any]:
         """
-        Parse a complete frame from the sensor.
+        Parse the data of a data frame from the sensor.
 
         Args:
-            frame: Complete frame data
-            data_length: Length of data portion
+            data_portion: The frame's data, between the length and the footer
 
         Returns:
             Dict[str, Any]: Parsed data or empty dict if error
         """
         try:
-            # Verify frame structure
-            if len(frame) < 10:  # Minimum frame size
-                return {}
-
-            header = frame[:4]
-            length_bytes = frame[4:6]
-            data_portion = frame[6:6+data_length]
-            footer = frame[6+data_length:6+data_length+4]
-
-            # Verify header and footer
-            if header != self.DATA_FRAME_HEADER or footer != self.DATA_FRAME_FOOTER:
-                logger.debug("Invalid frame header or footer")
-                return {}
-
             if len(data_portion) < 3:  # Minimum data: type + head + at least 1 byte
                 return {}
 
@@ -282,19 +306,20 @@ class PresenceSensor:
             head = data_portion[1]  # Should be 0xAA
 
             if head != 0xAA:
-                logger.debug(f"Invalid data head: 0x{head:02X}, expected 0xAA")
+                logger.debug("Invalid data head: 0x%02X, expected 0xAA", head)
                 return {}
 
             result = {
                 'data_type': data_type,
-                'data_type_name': self.DATA_TYPES.get(data_type, f'Unknown (0x{data_type:02X})')
+                'data_type_name': self.DATA_TYPES.get(data_type) or f'Unknown (0x{data_type:02X})'
             }
 
+            # The parsers take the target data apart by slicing, which doesn't copy on a memoryview
             if data_type == 0x02:  # Target basic information
-                target_data = self._parse_basic_target_data(data_portion[2:])
+                target_data = self._parse_basic_target_data(memoryview(data_portion)[2:])
                 result.update(target_data)
             elif data_type == 0x01:  # Engineering mode
-                target_data = self._parse_engineering_data(data_portion[2:])
+                target_data = self._parse_engineering_data(memoryview(data_portion)[2:])
                 result.update(target_data)
 
             return result
@@ -319,16 +344,14 @@ class PresenceSensor:
 
         try:
             # Unpack the target data (little endian format)
-            target_status = target_data[0]
-            move_distance = struct.unpack('<H', target_data[1:3])[0]  # cm
-            move_energy = target_data[3]
-            static_distance = struct.unpack('<H', target_data[4:6])[0]  # cm
-            static_energy = target_data[6]
-            detection_distance = struct.unpack('<H', target_data[7:9])[0]  # cm
+            # Distances are in cm
+            (target_status, move_distance, move_energy,
+             static_distance, static_energy, detection_distance) = _TARGET.unpack_from(target_data)
 
             return {
                 'target_status': target_status,
-                'target_state': self.TARGET_STATES.get(target_status, f'Unknown (0x{target_status:02X})'),
+                'target_state': (self.TARGET_STATES[target_status] if target_status < len(self.TARGET_STATES)
+                                 else f'Unknown (0x{target_status:02X})'),
                 'move_distance': move_distance,
                 'move_energy': move_energy,
                 'static_distance': static_distance,
@@ -372,25 +395,20 @@ class PresenceSensor:
                     # Parse energy values for each gate if available
                     if len(eng_data) > 2:
                         energy_data = eng_data[2:]
-                        gate_energies = []
 
                         # The exact parsing depends on the number of gates configured
                         gates = min(8, len(energy_data) // 2)  # Assume max 8 gates, 2 bytes per gate type
 
-                        for i in range(gates):
-                            if i * 2 + 1 < len(energy_data):
-                                move_energy = energy_data[i * 2] if i * 2 < len(energy_data) else 0
-                                static_energy = energy_data[i * 2 + 1] if i * 2 + 1 < len(energy_data) else 0
-                                distance_m = i * 0.75  # Default 0.75m per gate
-
-                                gate_energies.append({
-                                    'gate': i,
-                                    'distance_m': distance_m,
-                                    'move_energy': move_energy,
-                                    'static_energy': static_energy
-                                })
-
-                        result['gate_energies'] = gate_energies
+                        # Unpack the (move, static) energy pairs of all gates in one call
+                        result['gate_energies'] = [
+                            {
+                                'gate': i,
+                                'distance_m': _GATE_DISTANCES[i],
+                                'move_energy': move_energy,
+                                'static_energy': static_energy
+                            }
+                            for i, (move_energy, static_energy) in enumerate(_U8_PAIR.iter_unpack(energy_data[:gates * 2]))
+                        ]
 
         return result
 
@@ -415,32 +433,45 @@ class PresenceSensor:
             return False
 
         try:
+            # Drop any stale responses once. Data frames that arrive between the
+            # commands are skipped by _read_frame, which syncs on the ACK header.
+            self._serial.reset_input_buffer()
+
             # Enable configuration mode
-            if not self._send_command(self.CMD_ENABLE_CONFIG, struct.pack('<H', 0x0001)):
+            if not self._send_command(self.CMD_ENABLE_CONFIG, _U16.pack(0x0001)):
                 logger.error("Failed to enable configuration mode")
                 return False
 
             # Set distance parameters
-            data = bytearray()
-            data.extend(struct.pack('<HI', 0x0000, max_motion_gate))  # Max motion gate
-            data.extend(struct.pack('<HI', 0x0001, max_static_gate))  # Max static gate  
-            data.extend(struct.pack('<HI', 0x0002, no_one_duration))  # No-one duration
+            data = _PARAMETERS.pack(
+                0x0000, max_motion_gate,  # Max motion gate
+                0x0001, max_static_gate,  # Max static gate
+                0x0002, no_one_duration  # No-one duration
+            )
 
-            if not self._send_command(self.CMD_SET_DISTANCE_PARAMS, bytes(data)):
+            if not self._send_command(self.CMD_SET_DISTANCE_PARAMS, data):
                 logger.error("Failed to set distance parameters")
                 self._send_command(self.CMD_END_CONFIG)  # Try to end config mode
                 return False
 
             # Set sensitivity for individual gates if provided
             if motion_sensitivity and static_sensitivity:
+                commands = []
                 for gate in range(min(len(motion_sensitivity), len(static_sensitivity))):
-                    data = bytearray()
-                    data.extend(struct.pack('<HI', 0x0000, gate))  # Distance gate
-                    data.extend(struct.pack('<HI', 0x0001, motion_sensitivity[gate]))  # Motion sensitivity
-                    data.extend(struct.pack('<HI', 0x0002, static_sensitivity[gate]))  # Static sensitivity
-
-                    if not self._send_command(self.CMD_SET_SENSITIVITY, bytes(data)):
-                        logger.warning(f"Failed to set sensitivity for gate {gate}")
+                    data = _PARAMETERS.pack(
+                        0x0000, gate,  # Distance gate
+                        0x0001, motion_sensitivity[gate],  # Motion sensitivity
+                        0x0002, static_sensitivity[gate]  # Static sensitivity
+                    )
+                    commands.append((self.CMD_SET_SENSITIVITY, data))
+
+                # Send all gates at once. Every gate gets the same ACK, so when one is missing there is no
+                # telling which gate it belonged to, and all of them are resent one at a time.
+                if not self._send_commands(commands):
+                    logger.debug("Not all gates were acknowledged, resending them one at a time")
+                    for gate, command in enumerate(commands):
+                        if not self._send_command(*command):
+                            logger.warning(f"Failed to set sensitivity for gate {gate}")
 
             # End configuration mode
             if not self._send_command(self.CMD_END_CONFIG):
@@ -482,54 +513,29 @@ class PresenceSensor:
 
         # Flag to track if we've already retried
         retry_attempted = False
+        # Only hex-dump the frames when they will be logged
+        debug = logger.isEnabledFor(logging.DEBUG)
 
         while True:
             try:
-                # Create command frame
-                frame = bytearray()
-
-                # Frame header
-                frame.extend(self.FRAME_HEADER)
-
-                # Data length (command word + command data)
-                data_length = 2 + len(command_data)
-                frame.extend(struct.pack('<H', data_length))
-
-                # Command word (little endian)
-                frame.extend(struct.pack('<H', command_word))
-
-                # Command data
-                frame.extend(command_data)
-
-                # Frame footer
-                frame.extend(self.FRAME_FOOTER)
-
-                # Clear input buffer
-                self._serial.reset_input_buffer()
+                frame = self._build_command(command_word, command_data)
 
                 # Send command
                 self._serial.write(frame)
-                logger.debug(f"Sent command 0x{command_word:04X}: {frame.hex().upper()}")
+                if debug:
+                    logger.debug("Sent command 0x%04X: %s", command_word, frame.hex().upper())
 
                 # Read response header (4 bytes)
-                response_frame, response_length = self._read_frame(self.FRAME_HEADER, self.FRAME_FOOTER, False)
-                logger.debug(f"Response: {response_frame.hex().upper()}")
+                response = self._read_frame(self.FRAME_HEADER, self.FRAME_FOOTER)
+                if debug:
+                    logger.debug("Response: %s", response.hex().upper())
 
-                # Extract ACK command word and status
-                ack_cmd = struct.unpack('<H', response_frame[6:8])[0]
-                expected_ack = command_word | 0x0100
+                if len(response) < _ACK.size:
+                    if retry_attempted:
+                        logger.error("Error sending command: no response from sensor")
+                        return False
 
-                if ack_cmd != expected_ack:
-                    logger.debug(f"Unexpected ACK command: 0x{ack_cmd:04X}, expected: 0x{expected_ack:04X}")
-                    return False
-
-                # Check status (0 = success, 1 = failure)
-                status = struct.unpack('<H', response_frame[8:10])[0]
-                return status == 0
-
-            except struct.error as e:
-                if "unpack requires a buffer of 2 bytes" in str(e) and not retry_attempted:
-                    logger.warning("Encountered 'unpack requires a buffer of 2 bytes' error. Restarting sensor and retrying...")
+                    logger.warning("No response from sensor. Restarting sensor and retrying...")
                     retry_attempted = True
 
                     # Restart the sensor
@@ -540,14 +546,67 @@ class PresenceSensor:
 
                     # Continue to retry
                     continue
-                else:
-                    # Either it's a different error or we've already retried
-                    logger.error(f"Error sending command: {e}")
+
+                # Extract ACK command word and status (0 = success, 1 = failure)
+                ack_cmd, status = _ACK.unpack_from(response)
+                expected_ack = command_word | 0x0100
+
+                if ack_cmd != expected_ack:
+                    logger.debug("Unexpected ACK command: 0x%04X, expected: 0x%04X", ack_cmd, expected_ack)
                     return False
+
+                return status == 0
+
             except Exception as e:
                 logger.error(f"Error sending command: {e}")
                 return False
 
+    def _send_commands(self, commands: List[Tuple[int, bytes]]) -> bool:
+        """
+        Send several commands to the sensor in a single write and collect their ACK responses.
+
+        Unlike _send_command, this doesn't restart the sensor when it doesn't respond.
+
+        Args:
+            commands: (command word, command data) pairs to send
+
+        Returns:
+            bool: True if every command was acknowledged successfully, False otherwise
+        """
+        if not self.is_connected():
+            logger.error("Cannot send commands: Sensor not connected")
+            return False
+
+        self._serial.write(b''.join(self._build_command(command_word, command_data)
+                                    for command_word, command_data in commands))
+        logger.debug("Sent %d commands", len(commands))
+
+        # The sensor answers the commands in order. Read every answer, so none is left for a later command.
+        acknowledged = True
+        for command_word, _ in commands:
+            response = self._read_frame(self.FRAME_HEADER, self.FRAME_FOOTER)
+            if len(response) < _ACK.size or _ACK.unpack_from(response) != (command_word | 0x0100, 0):
+                acknowledged = False
+        return acknowledged
+
+    def _build_command(self, command_word: int, command_data: bytes = b'') -> bytes:
+        """
+        Build a command frame.
+
+        Args:
+            command_word: Command word to send
+            command_data: Command data bytes
+
+        Returns:
+            bytes: The frame
+        """
+        # The data length covers the command word and the command data
+        return b''.join((
+            _COMMAND_PREFIX.pack(self.FRAME_HEADER, 2 + len(command_data), command_word),
+            command_data,
+            self.FRAME_FOOTER
+        ))
+
     def is_presence_detected(self) -> bool:
         """
         Check if human presence is detected.
@@ -558,8 +617,7 @@ class PresenceSensor:
         Returns:
             bool: True if presence detected, False otherwise
         """
-        with self._thread_lock:
-            return self._presence_detected
+        return self._presence_detected
 
     def is_static_target_detected(self) -> bool:
         """
@@ -568,10 +626,9 @@ class PresenceSensor:
         Returns:
             bool: True if a stationary target is detected, False otherwise
         """
-        with self._thread_lock:
-            target_status = self._last_data.get('target_status', 0)
-            # Target status 0x02 (stationary) or 0x03 (moving & stationary)
-            return target_status in [0x02, 0x03]
+        target_status = self._last_data.get('target_status', 0)
+        # Target status 0x02 (stationary) or 0x03 (moving & stationary)
+        return target_status in (0x02, 0x03)
 
     def is_moving_target_detected(self) -> bool:
         """
@@ -580,10 +637,24 @@ class PresenceSensor:
         Returns:
             bool: True if a moving target is detected, False otherwise
         """
-        with self._thread_lock:
-            target_status = self._last_data.get('target_status', 0)
-            # Target status 0x01 (moving) or 0x03 (moving & stationary)
-            return target_status in [0x01, 0x03]
+        target_status = self._last_data.get('target_status', 0)
+        # Target status 0x01 (moving) or 0x03 (moving & stationary)
+        return target_status in (0x01, 0x03)
+
+    def snapshot(self) -> SensorSnapshot:
+        """
+        Get the moving and static target state from the same sensor report.
+
+        Returns:
+            SensorSnapshot: The state of the targets
+        """
+        data = self._last_data
+        target_status = data.get('target_status', 0)
+        return SensorSnapshot(
+            moving=target_status in (0x01, 0x03),
+            static=target_status in (0x02, 0x03),
+            static_energy=data.get('static_energy', 0)
+        )
 
     def get_static_energy(self) -> int:
         """
@@ -592,8 +663,7 @@ class PresenceSensor:
         Returns:
             int: Energy level (0-100) of the static target, or 0 if no static target
         """
-        with self._thread_lock:
-            return self._last_data.get('static_energy', 0)
+        return self._last_data.get('static_energy', 0)
 
     def get_move_energy(self) -> int:
         """
@@ -602,5 +672,4 @@ class PresenceSensor:
         Returns:
             int: Energy level (0-100) of the moving target, or 0 if no moving target
         """
-        with self._thread_lock:
-            return self._last_data.get('move_energy', 0)
+        return self._last_data.get('move_energy', 0)
@@ -12,6 +12,7 @@ import logging
 from tests.test_simulation import run_simulation
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     print("Running Crescendo AI simulation tests...")
     run_simulation()
     print("Tests completed.")
\ No newline at end of file
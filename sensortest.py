@@ -6,7 +6,13 @@ Parses incoming data from the Human Static Presence sensor
 
 import serial
 import struct
-import time
+
+# Precompiled format of the protocol's little endian 16-bit fields
+_U16 = struct.Struct('<H')
+# Target status, moving distance/energy, static distance/energy, detection distance
+_TARGET = struct.Struct('<BHBHBH')
+# Moving and static energy of one distance gate
+_U8_PAIR = struct.Struct('<BB')
 
 class MmWaveParser:
     def __init__(self, port='/dev/ttyUSB0', baudrate=256000):
@@ -20,6 +26,8 @@ class MmWaveParser:
         self.ser = serial.Serial(port, baudrate, timeout=1)
         self.frame_header = b'\xF4\xF3\xF2\xF1'
         self.frame_footer = b'\xF8\xF7\xF6\xF5'
+        # Upper bound on the data length, so a corrupted length doesn't block on a long read
+        self.max_frame_length = 64
         
         # Target state definitions
         self.target_states = {
@@ -42,48 +50,28 @@ class MmWaveParser:
         print("Starting to read mmWave sensor data...")
         print("Press Ctrl+C to stop\n")
         
-        buffer = b''
-        
         try:
             while True:
-                # Read available data
-                if self.ser.in_waiting > 0:
-                    data = self.ser.read(self.ser.in_waiting)
-                    buffer += data
+                # Skip to the end of the next frame header, pyserial does the scanning
+                if not self.ser.read_until(self.frame_header).endswith(self.frame_header):
+                    continue  # Timed out without a header
                     
-                    # Process complete frames
-                    while len(buffer) >= 4:
-                        # Look for frame header
-                        header_pos = buffer.find(self.frame_header)
-                        if header_pos == -1:
-                            # No header found, clear buffer
-                            buffer = buffer[-3:]  # Keep last 3 bytes in case header is split
-                            break
-                            
-                        # Remove data before header
-                        if header_pos > 0:
-                            buffer = buffer[header_pos:]
-                            
-                        # Check if we have enough data for frame length
-                        if len(buffer) < 6:
-                            break
-                            
-                        # Extract frame length (2 bytes after header, little endian)
-                        frame_length = struct.unpack('<H', buffer[4:6])[0]
-                        total_frame_size = 4 + 2 + frame_length + 4  # header + length + data + footer
-                        
-                        # Check if we have complete frame
-                        if len(buffer) < total_frame_size:
-                            break
-                            
-                        # Extract and parse frame
-                        frame = buffer[:total_frame_size]
-                        self.parse_frame(frame, frame_length)
-                        
-                        # Remove processed frame from buffer
-                        buffer = buffer[total_frame_size:]
+                # Extract frame length (2 bytes after header, little endian)
+                length_bytes = self.ser.read(2)
+                if len(length_bytes) < 2:
+                    continue
+                frame_length = _U16.unpack(length_bytes)[0]
+                if frame_length > self.max_frame_length:
+                    # Not a real frame: look for the next header
+                    print(f"Invalid frame length: {frame_length}")
+                    continue
                 
-                time.sleep(0.01)  # Small delay to prevent excessive CPU usage
+                # Read the data and the footer in one go
+                rest = self.ser.read(frame_length + 4)
+                if len(rest) < frame_length + 4:
+                    continue
+                    
+                self.parse_frame(self.frame_header + length_bytes + rest, frame_length)
                 
         except KeyboardInterrupt:
             print("\nStopping data collection...")
@@ -103,8 +91,9 @@ class MmWaveParser:
             if len(frame) < 10:  # Minimum frame size
                 return
                 
+            # Slice through a view so the parts aren't copied
+            frame = memoryview(frame)
             header = frame[:4]
-            length_bytes = frame[4:6]
             data_portion = frame[6:6+data_length]
             footer = frame[6+data_length:6+data_length+4]
             
@@ -124,7 +113,7 @@ class MmWaveParser:
                 print(f"Invalid data head: 0x{head:02X}, expected 0xAA")
                 return
                 
-            print(f"Data Type: {self.data_types.get(data_type, f'Unknown (0x{data_type:02X})')}")
+            print(f"Data Type: {self.data_types.get(data_type) or f'Unknown (0x{data_type:02X})'}")
             
             if data_type == 0x02:  # Target basic information
                 self.parse_basic_target_data(data_portion[2:])
@@ -148,21 +137,18 @@ class MmWaveParser:
             
         try:
             # Unpack the target data (little endian format)
-            target_status = target_data[0]
-            move_distance = struct.unpack('<H', target_data[1:3])[0]  # cm
-            move_energy = target_data[3]
-            static_distance = struct.unpack('<H', target_data[4:6])[0]  # cm
-            static_energy = target_data[6]
-            detection_distance = struct.unpack('<H', target_data[7:9])[0]  # cm
+            # Distances are in cm
+            (target_status, move_distance, move_energy,
+             static_distance, static_energy, detection_distance) = _TARGET.unpack_from(target_data)
             
-            # Print parsed data
-            print(f"  Target Status: {self.target_states.get(target_status, f'Unknown (0x{target_status:02X})')}")
-            print(f"  Moving Target Distance: {move_distance} cm")
-            print(f"  Moving Target Energy: {move_energy}")
-            print(f"  Static Target Distance: {static_distance} cm")
-            print(f"  Static Target Energy: {static_energy}")
-            print(f"  Detection Distance: {detection_distance} cm")
-            print("-" * 40)
+            # Print parsed data with a single write to the terminal
+            print(f"  Target Status: {self.target_states.get(target_status) or f'Unknown (0x{target_status:02X})'}\n"
+                  f"  Moving Target Distance: {move_distance} cm\n"
+                  f"  Moving Target Energy: {move_energy}\n"
+                  f"  Static Target Distance: {static_distance} cm\n"
+                  f"  Static Target Energy: {static_energy}\n"
+                  f"  Detection Distance: {detection_distance} cm\n"
+                  + "-" * 40)
             
         except Exception as e:
             print(f"Error parsing basic target data: {e}")
@@ -199,12 +185,12 @@ class MmWaveParser:
                         # This is a simplified version - you may need to adjust based on your configuration
                         gates = min(8, len(energy_data) // 2)  # Assume max 8 gates, 2 bytes per gate type
                         
-                        for i in range(gates):
-                            if i * 2 + 1 < len(energy_data):
-                                move_energy = energy_data[i * 2] if i * 2 < len(energy_data) else 0
-                                static_energy = energy_data[i * 2 + 1] if i * 2 + 1 < len(energy_data) else 0
-                                distance_m = i * 0.75  # Default 0.75m per gate
-                                print(f"      Gate {i} ({distance_m:.2f}m): Move={move_energy}, Static={static_energy}")
+                        # Print all gates with a single write; default 0.75m per gate
+                        if gates:
+                            print("\n".join(
+                                f"      Gate {i} ({i * 0.75:.2f}m): Move={move_energy}, Static={static_energy}"
+                                for i, (move_energy, static_energy) in enumerate(_U8_PAIR.iter_unpack(energy_data[:gates * 2]))
+                            ))
         
         print("-" * 40)
 
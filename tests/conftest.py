@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration for the Crescendo AI tests.
+"""
+
+import logging
+
+# Only show problems on the console, pytest captures the full log of failing tests
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.WARNING)
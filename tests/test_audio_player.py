@@ -7,15 +7,15 @@ without requiring actual audio hardware.
 """
 
 import os
-import sys
 import unittest
 import tempfile
 import shutil
+from unittest import mock
 
-# Add the parent directory to the path so we can import the crescendo_ai package
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pygame
 
 from crescendo_ai.audio import AudioPlayer
+from crescendo_ai.config import Playlist
 
 class TestAudioPlayer(unittest.TestCase):
     """Test cases for the AudioPlayer class."""
@@ -57,8 +57,8 @@ class TestAudioPlayer(unittest.TestCase):
         
         # Check that our test track is found
         self.assertEqual(len(tracks), 1, "Should find exactly one track")
-        self.assertEqual(tracks[0]['name'], "test_track.mp3", "Track name should match")
-        self.assertEqual(tracks[0]['path'], self.test_audio_file, "Track path should match")
+        self.assertEqual(tracks[0].name, "test_track.mp3", "Track name should match")
+        self.assertEqual(tracks[0].path, self.test_audio_file, "Track path should match")
     
     def test_play_and_stop(self):
         """Test that the AudioPlayer can play and stop tracks."""
@@ -79,5 +79,133 @@ class TestAudioPlayer(unittest.TestCase):
         self.assertTrue(stop_result, "Stopping playback should succeed")
         self.assertFalse(self.audio_player.is_playing(), "AudioPlayer should not be playing after stop")
 
+class FakeMusic:
+    """Stand-in for pygame.mixer.music that plays tracks when the test says so."""
+
+    def __init__(self, queue_fails=False):
+        self.queue_fails = queue_fails
+        self.loaded = None
+        self.queued = None
+        self.busy = False
+        self.pos = -1
+
+    def load(self, path):
+        self.loaded = path
+        self.queued = None
+
+    def play(self):
+        self.busy = True
+        self.pos = 0
+
+    def stop(self):
+        self.busy = False
+        self.pos = -1
+        self.queued = None
+
+    def queue(self, path):
+        if self.queue_fails:
+            raise pygame.error("queue failed")
+        self.queued = path
+
+    def get_busy(self):
+        return self.busy
+
+    def get_pos(self):
+        return self.pos
+
+    def progress(self, ms):
+        """Let the current track play for a while."""
+        self.pos += ms
+
+    def finish_track(self):
+        """End the current track, starting the queued track if there is one."""
+        if self.queued is not None:
+            self.loaded, self.queued = self.queued, None
+            self.pos = 10
+        else:
+            self.busy = False
+            self.pos = -1
+
+
+class TestTrackEnd(unittest.TestCase):
+    """Test cases for moving on to the next track of a playlist when a track ends."""
+
+    def setUp(self):
+        """Set up a playlist of four tracks and an audio player with a fake mixer."""
+        self.test_music_dir = tempfile.mkdtemp()
+        self.tracks = []
+        for i in range(4):
+            track = os.path.join(self.test_music_dir, f"track{i}.mp3")
+            with open(track, 'w') as f:
+                f.write("This is a dummy audio file for testing")
+            self.tracks.append(track)
+        self.playlist = Playlist("test", self.tracks)
+
+        self.audio_player = AudioPlayer(music_dir=self.test_music_dir)
+        self.audio_player._is_initialized = True
+        self.audio_player._current_playlist = self.playlist
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_music_dir)
+
+    def start(self, music):
+        """Play the first track of the playlist on a fake mixer."""
+        patcher = mock.patch("pygame.mixer.music", music)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertTrue(self.audio_player.play_next_track())
+        self.assertEqual(music.loaded, self.tracks[0])
+        self.assertEqual(self.playlist.current_track_index, 1)
+
+    def test_queued_track_advances_playlist_once(self):
+        """Test that the playlist advances once when the mixer starts the queued track by itself."""
+        music = FakeMusic()
+        self.start(music)
+        self.assertEqual(music.queued, self.tracks[1])
+
+        # Still playing the first track
+        music.progress(1000)
+        self.audio_player.check_for_track_end()
+        self.assertEqual(self.playlist.current_track_index, 1)
+
+        # The mixer starts the queued track, which makes the position jump back
+        music.finish_track()
+        self.audio_player.check_for_track_end()
+        self.assertEqual(self.playlist.current_track_index, 2)
+        self.assertEqual(self.audio_player._current_track, self.tracks[1])
+        self.assertEqual(music.queued, self.tracks[2])
+
+        # Further checks while the second track plays don't advance again
+        for _ in range(3):
+            music.progress(1000)
+            self.audio_player.check_for_track_end()
+        self.assertEqual(self.playlist.current_track_index, 2)
+        self.assertEqual(music.loaded, self.tracks[1])
+
+    def test_track_end_advances_playlist_once(self):
+        """Test that the playlist advances once when the mixer goes idle without a queued track."""
+        music = FakeMusic(queue_fails=True)
+        self.start(music)
+        self.assertIsNone(music.queued)
+
+        # Still playing the first track
+        music.progress(1000)
+        self.audio_player.check_for_track_end()
+        self.assertEqual(self.playlist.current_track_index, 1)
+
+        # The mixer goes idle, so the next track is played
+        music.finish_track()
+        self.audio_player.check_for_track_end()
+        self.assertEqual(self.playlist.current_track_index, 2)
+        self.assertEqual(music.loaded, self.tracks[1])
+        self.assertTrue(music.busy)
+
+        # Further checks while the second track plays don't advance again
+        for _ in range(3):
+            music.progress(1000)
+            self.audio_player.check_for_track_end()
+        self.assertEqual(self.playlist.current_track_index, 2)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
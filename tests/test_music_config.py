@@ -8,84 +8,106 @@ to verify that the correct playlist is selected for each date and time.
 
 import os
 import sys
-import logging
 from datetime import datetime
-from unittest.mock import patch
 
-# Add the parent directory to the path so we can import the crescendo_ai package
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
 
 from crescendo_ai.config import load_music_config
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
-
-logger = logging.getLogger(__name__)
-
-def test_music_config():
-    """Test the music configuration with different dates and times."""
-    logger.info("Testing music configuration...")
-    
-    # Load the music configuration
-    config_path = os.path.join("music", "music_config.yaml")
-    music_dir = "music"
-    
-    if not os.path.exists(config_path):
-        logger.error(f"Configuration file not found: {config_path}")
-        return False
-    
-    music_config = load_music_config(config_path, music_dir)
-    
-    # Test dates and times
-    test_cases = [
-        # Format: (date_str, hour, expected_playlist)
-        ("2025-07-11", 3, "kamp_hiphop"),
-        ("2025-07-12", 10, "kamp_jazz"),
-        ("2025-07-13", 2, "kamp_jazz"),
-        ("2025-07-13", 15, "kamp_klassiek"),
-        ("2025-07-14", 4, "kamp_klassiek"),
-        ("2025-07-14", 20, "kamp_margi"),
-        ("2025-07-15", 1, "kamp_margi"),
-        ("2025-07-15", 12, "kamp_rock_00s"),
-        ("2025-07-16", 3, "kamp_rock_00s"),
-        ("2025-07-16", 22, "kamp_rock_70_80s"),
-        ("2025-07-17", 5, "kamp_rock_70_80s"),
-        ("2025-07-17", 18, "kamp_rock_90s"),
-        ("2025-07-18", 4, "kamp_rock_90s"),
-        ("2025-07-18", 14, "kamp_rock_oldies"),
-        ("2025-07-19", 3, "kamp_rock_oldies"),
-        ("2025-07-19", 12, "kamp_reggae"),
-        # Test a date outside the schedule
-        ("2025-07-20", 12, "default"),
+# Location of the configuration that is tested
+CONFIG_PATH = os.path.join("music", "music_config.yaml")
+MUSIC_DIR = "music"
+
+# Test dates and times
+TEST_CASES = [
+    # Format: (test_datetime, expected_playlist)
+    (datetime(2025, 7, 11, 3), "kamp_hiphop"),
+    (datetime(2025, 7, 12, 10), "kamp_jazz"),
+    (datetime(2025, 7, 13, 2), "kamp_jazz"),
+    (datetime(2025, 7, 13, 15), "kamp_klassiek"),
+    (datetime(2025, 7, 14, 4), "kamp_klassiek"),
+    (datetime(2025, 7, 14, 20), "kamp_margi"),
+    (datetime(2025, 7, 15, 1), "kamp_margi"),
+    (datetime(2025, 7, 15, 12), "kamp_rock_00s"),
+    (datetime(2025, 7, 16, 3), "kamp_rock_00s"),
+    (datetime(2025, 7, 16, 22), "kamp_rock_70_80s"),
+    (datetime(2025, 7, 17, 5), "kamp_rock_70_80s"),
+    (datetime(2025, 7, 17, 18), "kamp_rock_90s"),
+    (datetime(2025, 7, 18, 4), "kamp_rock_90s"),
+    (datetime(2025, 7, 18, 14), "kamp_rock_oldies"),
+    (datetime(2025, 7, 19, 3), "kamp_rock_oldies"),
+    (datetime(2025, 7, 19, 12), "kamp_reggae"),
+    # Test a date outside the schedule
+    (datetime(2025, 7, 20, 12), "default"),
+]
+
+@pytest.fixture(scope="module")
+def music_config():
+    """Load the music configuration once for all test cases."""
+    if not os.path.exists(CONFIG_PATH):
+        pytest.skip(f"Configuration file not found: {CONFIG_PATH}")
+
+    return load_music_config(CONFIG_PATH, MUSIC_DIR)
+
+@pytest.mark.parametrize("test_datetime, expected_playlist", TEST_CASES,
+                         ids=[f"{test_datetime:%Y-%m-%d %H:%M}" for test_datetime, _ in TEST_CASES])
+def test_music_config(music_config, test_datetime, expected_playlist):
+    """Test that the expected playlist is selected for a date and time."""
+    # Get the playlist for our test datetime
+    current_playlist = music_config.get_current_playlist(test_datetime)
+
+    playlist_name = current_playlist.name if current_playlist else "None"
+    assert playlist_name == expected_playlist, \
+        f"{test_datetime:%Y-%m-%d %H:%M} - Expected {expected_playlist}, got {playlist_name}"
+
+# Schedules for Thursday 2025-12-25, in the order they are listed
+SCHEDULE_CONFIG = """
+playlists:
+  weekly:
+    tracks: [weekly.mp3]
+  christmas:
+    tracks: [christmas.mp3]
+  default:
+    tracks: [default.mp3]
+schedules:
+  # Listed first, but the date-specific schedule still wins
+  - days: [3]
+    hours: [9, 10, 11]
+    playlist: weekly
+  - date: {date}
+    hours: [10, "11", 11.0, 24, 12]
+    playlist: christmas
+"""
+
+def load_schedule_config(tmp_path, date):
+    """Write the schedule configuration with the given YAML date value and load it."""
+    config_path = tmp_path / "music_config.yaml"
+    config_path.write_text(SCHEDULE_CONFIG.format(date=date))
+    return load_music_config(str(config_path), str(tmp_path))
+
+@pytest.mark.parametrize("date", ["2025-12-25", '"2025-12-25"'], ids=["unquoted", "quoted"])
+@pytest.mark.parametrize("hour, expected_playlist", [
+    (9, "weekly"),  # Only the weekly schedule covers this hour
+    (10, "christmas"),  # The date-specific schedule wins over the weekly one
+    (11, "weekly"),  # The date-specific schedule has no int 11, so the weekly one applies
+    (12, "christmas"),  # Only the date-specific schedule covers this hour
+    (13, "default"),  # Nothing is scheduled
+])
+def test_schedule_precedence(tmp_path, date, hour, expected_playlist):
+    """Test that dates win over days of the week, however the date is written, and only int hours count."""
+    music_config = load_schedule_config(tmp_path, date)
+
+    current_playlist = music_config.get_current_playlist(datetime(2025, 12, 25, hour))
+
+    assert current_playlist is not None and current_playlist.name == expected_playlist
+
+def test_schedule_invalid_hours_ignored(tmp_path):
+    """Test that hours that aren't ints from 0 to 23 don't end up in the schedule."""
+    music_config = load_schedule_config(tmp_path, "2025-12-25")
+
+    assert music_config._dated["2025-12-25"] == [
+        music_config.get_playlist("christmas") if hour in (10, 12) else None for hour in range(24)
     ]
-    
-    for date_str, hour, expected_playlist in test_cases:
-        # Create a datetime object for the test case
-        test_datetime = datetime.strptime(f"{date_str} {hour:02d}:00:00", "%Y-%m-%d %H:%M:%S")
-        
-        # Mock the datetime.now() function to return our test datetime
-        with patch('crescendo_ai.config.datetime') as mock_datetime:
-            mock_datetime.now.return_value = test_datetime
-            mock_datetime.strptime = datetime.strptime
-            
-            # Get the current playlist
-            current_playlist = music_config.get_current_playlist()
-            
-            # Check if the playlist is correct
-            if current_playlist and current_playlist.name == expected_playlist:
-                logger.info(f"✓ {date_str} {hour:02d}:00 - Got expected playlist: {expected_playlist}")
-            else:
-                playlist_name = current_playlist.name if current_playlist else "None"
-                logger.error(f"✗ {date_str} {hour:02d}:00 - Expected {expected_playlist}, got {playlist_name}")
-    
-    logger.info("Music configuration test completed")
-    return True
 
 if __name__ == "__main__":
-    test_music_config()
\ No newline at end of file
+    sys.exit(pytest.main([__file__]))
@@ -5,22 +5,166 @@ Test script for the updated PresenceSensor class.
 
 import sys
 import time
+import struct
 import logging
+
+import pytest
+import serial
+
 from crescendo_ai.sensor import PresenceSensor
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
+logger = logging.getLogger(__name__)
+
+
+class FakeSerial:
+    """
+    Stand-in for a serial port connected to the sensor.
+
+    Bytes in the input buffer are returned by the reads, and every command frame that is written
+    is acknowledged, unless its ACK is set to be dropped.
+    """
+
+    def __init__(self, data: bytes = b'', drop_acks=()):
+        """
+        Create the fake port.
+
+        Args:
+            data: Bytes that are waiting to be read
+            drop_acks: Indices of the written commands, counting from 0, that don't get an ACK
+        """
+        self.is_open = True
+        self.buffer = bytearray(data)
+        self.drop_acks = set(drop_acks)
+        self.commands = []
+
+    def read(self, size: int = 1) -> bytes:
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def read_until(self, expected: bytes = b'\n') -> bytes:
+        end = self.buffer.find(expected)
+        return self.read(len(self.buffer) if end < 0 else end + len(expected))
+
+    def reset_input_buffer(self) -> None:
+        self.buffer.clear()
+
+    def write(self, data: bytes) -> int:
+        header, footer = PresenceSensor.FRAME_HEADER, PresenceSensor.FRAME_FOOTER
+        frames = bytes(data)
+        while frames:
+            assert frames.startswith(header), "Not a command frame"
+            length = struct.unpack_from('<H', frames, 4)[0]
+            command_word = struct.unpack_from('<H', frames, 6)[0]
+            assert frames[6 + length:10 + length] == footer, "Bad command frame footer"
+            frames = frames[10 + length:]
+
+            if len(self.commands) not in self.drop_acks:
+                self.buffer += ack_frame(command_word)
+            self.commands.append(command_word)
+        return len(data)
+
+    def close(self) -> None:
+        self.is_open = False
+
+
+def ack_frame(command_word: int, status: int = 0) -> bytes:
+    """Build the sensor's ACK frame for a command."""
+    payload = struct.pack('<HH', command_word | 0x0100, status)
+    return PresenceSensor.FRAME_HEADER + struct.pack('<H', len(payload)) + payload + PresenceSensor.FRAME_FOOTER
+
+
+def fake_sensor(serial_port: FakeSerial) -> PresenceSensor:
+    """Create a sensor that talks to a fake serial port."""
+    sensor = PresenceSensor(port='fake', timeout=0.1)
+    sensor._serial = serial_port
+    sensor._is_connected = True
+    return sensor
+
+
+def data_frame(data: bytes, length: int = None, footer: bytes = PresenceSensor.DATA_FRAME_FOOTER) -> bytes:
+    """Build a data frame, optionally with a wrong length or footer."""
+    length = len(data) if length is None else length
+    return PresenceSensor.DATA_FRAME_HEADER + struct.pack('<H', length) + data + footer
+
+
+# The data of a basic target information frame
+FRAME_DATA = bytes([0x02, 0xAA, 0x03, 0x64, 0x00, 0x1E, 0x96, 0x00, 0x32, 0x78, 0x00, 0x55, 0x00])
+
+
+@pytest.mark.parametrize("data", [
+    data_frame(FRAME_DATA),
+    b'\x01\x02garbage\xF4\xF3' + data_frame(FRAME_DATA),
+    # A header followed by a length above MAX_FRAME_LENGTH is skipped without reading the length's worth
+    PresenceSensor.DATA_FRAME_HEADER + struct.pack('<H', 0xFFFF) + data_frame(FRAME_DATA),
+    data_frame(FRAME_DATA, footer=b'\x00\x00\x00\x00') + data_frame(FRAME_DATA),
+], ids=["valid", "garbage before header", "oversized length", "bad footer"])
+def test_read_frame(data):
+    """Test that _read_frame returns the data of the first valid frame."""
+    sensor = fake_sensor(FakeSerial(data))
+
+    assert sensor._read_frame(PresenceSensor.DATA_FRAME_HEADER, PresenceSensor.DATA_FRAME_FOOTER) == FRAME_DATA
+
+
+def test_read_frame_incomplete():
+    """Test that _read_frame returns empty bytes when the frame is cut off."""
+    sensor = fake_sensor(FakeSerial(data_frame(FRAME_DATA)[:-3]))
+
+    assert sensor._read_frame(PresenceSensor.DATA_FRAME_HEADER, PresenceSensor.DATA_FRAME_FOOTER) == b''
+
+
+class FailingSerial(FakeSerial):
+    """A serial port that has been unplugged."""
+
+    def read_until(self, expected: bytes = b'\n') -> bytes:
+        raise serial.SerialException("device reports readiness to read but returned no data")
+
+
+def test_read_frame_backs_off_on_error():
+    """Test that a failing port makes _read_frame wait before returning, unless the sensor is stopped."""
+    sensor = fake_sensor(FailingSerial())
+
+    start = time.monotonic()
+    assert sensor._read_frame(PresenceSensor.DATA_FRAME_HEADER, PresenceSensor.DATA_FRAME_FOOTER) == b''
+    assert time.monotonic() - start >= 0.09
+
+    # Stopping the read thread sets the event, which ends the wait right away
+    sensor._stop_event.set()
+    start = time.monotonic()
+    assert sensor._read_frame(PresenceSensor.DATA_FRAME_HEADER, PresenceSensor.DATA_FRAME_FOOTER) == b''
+    assert time.monotonic() - start < 0.05
+
+
+def test_configure_resends_all_gates_when_an_ack_is_lost():
+    """A lost gate ACK can't be attributed to a gate, so every gate has to be sent again."""
+    # Commands: enable config, distance parameters, then the 8 gates in one write. Drop the ACK of gate 3.
+    serial_port = FakeSerial(drop_acks={2 + 3})
+    sensor = fake_sensor(serial_port)
+
+    assert sensor.configure(motion_sensitivity=[50] * 8, static_sensitivity=[40] * 8)
+
+    gates = [PresenceSensor.CMD_SET_SENSITIVITY] * 8
+    assert serial_port.commands == [
+        PresenceSensor.CMD_ENABLE_CONFIG,
+        PresenceSensor.CMD_SET_DISTANCE_PARAMS,
+        *gates,  # All at once
+        *gates,  # Resent one at a time
+        PresenceSensor.CMD_END_CONFIG,
     ]
-)
 
-logger = logging.getLogger(__name__)
 
-def test_sensor(port='/dev/ttyAMA0'):
-    """Test the PresenceSensor class with the specified port."""
+def test_configure_sends_gates_once_when_all_are_acknowledged():
+    """Gates are only resent when an ACK is missing."""
+    serial_port = FakeSerial()
+    sensor = fake_sensor(serial_port)
+
+    assert sensor.configure(motion_sensitivity=[50] * 8, static_sensitivity=[40] * 8)
+    assert serial_port.commands.count(PresenceSensor.CMD_SET_SENSITIVITY) == 8
+
+
+@pytest.mark.hardware
+def test_sensor(port='/dev/ttyAMA0', sample_count=5):
+    """Test the PresenceSensor class with the specified port, reading the given number of reports."""
     logger.info(f"Testing PresenceSensor on port {port}")
     
     # Create sensor instance
@@ -29,9 +173,7 @@ def test_sensor(port='/dev/ttyAMA0'):
     try:
         # Connect to sensor
         logger.info("Connecting to sensor...")
-        if not sensor.connect():
-            logger.error("Failed to connect to sensor")
-            return False
+        assert sensor.connect(), f"Failed to connect to sensor on {port}"
         
         logger.info("Connected to sensor")
         
@@ -48,37 +190,32 @@ def test_sensor(port='/dev/ttyAMA0'):
         if not config_ok:
             logger.warning("Failed to configure sensor - continuing with default configuration")
         
-        # Read data for 10 seconds
-        logger.info("Reading data for 10 seconds...")
-        start_time = time.time()
+        # Read a few reports, each read waits for the next frame (or the serial timeout)
+        logger.info(f"Reading {sample_count} reports...")
+        received = 0
         
-        while time.time() - start_time < 10:
+        for _ in range(sample_count):
             data = sensor.read_data()
             
             if data:
+                received += 1
                 logger.info(f"Data received: {data}")
                 logger.info(f"Presence detected: {sensor.is_presence_detected()}")
             else:
                 logger.warning("No data received")
-            
-            time.sleep(1)
         
+        assert received > 0, f"No data received in {sample_count} reads"
         logger.info("Test completed successfully")
-        return True
         
-    except KeyboardInterrupt:
-        logger.info("Test interrupted by user")
-    except Exception as e:
-        logger.error(f"Error during test: {e}", exc_info=True)
-        return False
     finally:
         # Disconnect sensor
         logger.info("Disconnecting sensor...")
         sensor.disconnect()
-    
-    return False
 
 if __name__ == "__main__":
+    # Log progress when run as a script, pytest configures logging itself
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
     # Use command line argument for port if provided
     port = sys.argv[1] if len(sys.argv) > 1 else '/dev/ttyAMA0'
     test_sensor(port)
\ No newline at end of file
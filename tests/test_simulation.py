@@ -8,28 +8,22 @@ and flow of the application.
 """
 
 import os
-import sys
-import time
 import logging
-import threading
 from typing import Optional
 
-# Add the parent directory to the path so we can import the crescendo_ai package
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import yaml
 
 from crescendo_ai.sensor import PresenceSensor
 from crescendo_ai.relay import USBRelay
 from crescendo_ai.audio import AudioPlayer
+from crescendo_ai.config import MusicConfig
 from crescendo_ai.main import CrescendoSystem
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# Use the libyaml-backed dumper when PyYAML was built with it
+try:
+    from yaml import CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeDumper as _Dumper
 
 logger = logging.getLogger(__name__)
 
@@ -56,9 +50,16 @@ class SimulatedPresenceSensor(PresenceSensor):
         """Check if the simulated sensor is connected."""
         return self._is_connected
 
+    def configure(self, *args, **kwargs) -> bool:
+        """Simulate configuring the sensor."""
+        return True
+
+    def start_reading(self) -> None:
+        """There is nothing to read, set_presence() reports the changes."""
+
     def read_data(self) -> dict:
         """Simulate reading data from the sensor."""
-        return {"presence": 1 if self._presence_detected else 0}
+        return self._last_data
 
     def is_presence_detected(self) -> bool:
         """Check if presence is detected in the simulation."""
@@ -72,8 +73,20 @@ class SimulatedPresenceSensor(PresenceSensor):
             detected: True to simulate presence, False for no presence
         """
         self._presence_detected = detected
+        # A present person is reported as a moving and stationary target
+        target_status = 0x03 if detected else 0x00
+        self._last_data = {
+            "target_status": target_status,
+            "presence": detected,
+            "move_energy": 50 if detected else 0,
+            "static_energy": 50 if detected else 0,
+        }
         state = "DETECTED" if detected else "NOT DETECTED"
-        logger.info(f"Simulated presence: {state}")
+        logger.info("Simulated presence: %s", state)
+
+        # Wake up the system like the sensor's read thread does
+        if self._state_callback is not None:
+            self._state_callback(target_status)
 
 
 class SimulatedUSBRelay(USBRelay):
@@ -102,13 +115,13 @@ class SimulatedUSBRelay(USBRelay):
     def turn_on(self, channel: int = 1) -> bool:
         """Simulate turning on the relay."""
         self._relay_state = True
-        logger.info(f"Simulated relay channel {channel} turned ON")
+        logger.info("Simulated relay channel %s turned ON", channel)
         return True
 
     def turn_off(self, channel: int = 1) -> bool:
         """Simulate turning off the relay."""
         self._relay_state = False
-        logger.info(f"Simulated relay channel {channel} turned OFF")
+        logger.info("Simulated relay channel %s turned OFF", channel)
         return True
 
     def get_state(self) -> bool:
@@ -131,11 +144,11 @@ class SimulatedAudioPlayer(AudioPlayer):
         logger.info("Simulated audio player initialized")
         self._is_initialized = True
 
-        # Try to load the music configuration if it exists
-        if os.path.exists(self.config_path):
-            from crescendo_ai.config import load_music_config
-            self.music_config = load_music_config(self.config_path, self.music_dir)
-            logger.info(f"Simulated audio player loaded music configuration from {self.config_path}")
+        # Keep the music configuration only if it could be loaded, a missing file is not an error
+        music_config = MusicConfig(self.config_path, self.music_dir)
+        if music_config.load():
+            self.music_config = music_config
+            logger.info("Simulated audio player loaded music configuration from %s", self.config_path)
 
         return True
 
@@ -176,7 +189,7 @@ class SimulatedAudioPlayer(AudioPlayer):
                 track_path = self._current_track
             else:
                 # Try to get a track from the scheduled playlist if available
-                if hasattr(self, 'music_config') and self.music_config:
+                if self.music_config:
                     current_playlist = self.music_config.get_current_playlist()
                     if current_playlist:
                         self._current_playlist = current_playlist
@@ -190,7 +203,7 @@ class SimulatedAudioPlayer(AudioPlayer):
 
         self._is_playing = True
         self._current_track = track_path
-        logger.info(f"Simulated audio player playing: {self._current_track}")
+        logger.info("Simulated audio player playing: %s", self._current_track)
         return True
 
     def play_playlist(self, playlist_name: str) -> bool:
@@ -199,22 +212,22 @@ class SimulatedAudioPlayer(AudioPlayer):
             logger.error("Cannot play playlist: Simulated audio player not initialized")
             return False
 
-        if not hasattr(self, 'music_config') or not self.music_config:
+        if not self.music_config:
             logger.error("Cannot play playlist: No music configuration loaded")
             return False
 
         playlist = self.music_config.get_playlist(playlist_name)
         if not playlist:
-            logger.error(f"Playlist not found: {playlist_name}")
+            logger.error("Playlist not found: %s", playlist_name)
             return False
 
         self._current_playlist = playlist
-        logger.info(f"Simulated audio player playing playlist: {playlist_name}")
+        logger.info("Simulated audio player playing playlist: %s", playlist_name)
 
         # Play the first track in the playlist
         next_track = playlist.get_next_track(self.music_dir)
         if not next_track:
-            logger.error(f"Playlist {playlist_name} is empty")
+            logger.error("Playlist %s is empty", playlist_name)
             return False
 
         return self.play(next_track)
@@ -227,7 +240,7 @@ class SimulatedAudioPlayer(AudioPlayer):
 
         if not self._current_playlist:
             # If no current playlist but we have a configuration, try to get the current scheduled playlist
-            if hasattr(self, 'music_config') and self.music_config:
+            if self.music_config:
                 self._current_playlist = self.music_config.get_current_playlist()
 
             # If still no playlist, we can't play the next track
@@ -237,7 +250,7 @@ class SimulatedAudioPlayer(AudioPlayer):
 
         next_track = self._current_playlist.get_next_track(self.music_dir)
         if not next_track:
-            logger.error(f"Playlist {self._current_playlist.name} is empty")
+            logger.error("Playlist %s is empty", self._current_playlist.name)
             return False
 
         return self.play(next_track)
@@ -266,7 +279,7 @@ class SimulatedAudioPlayer(AudioPlayer):
             logger.error("Cannot set volume: Simulated audio player not initialized")
             return False
 
-        logger.info(f"Simulated audio player volume set to {volume:.2f}")
+        logger.info("Simulated audio player volume set to %.2f", volume)
         return True
 
 
@@ -281,48 +294,66 @@ class SimulatedCrescendoSystem(CrescendoSystem):
         self.audio_player = SimulatedAudioPlayer(music_dir=self.music_dir, config_path=self.config_path)
 
 
+# A simple configuration for testing
+TEST_CONFIG = {
+    "playlists": {
+        "test_playlist": {
+            "tracks": [
+                "simulated_track1.mp3",
+                "simulated_track2.mp3",
+                "simulated_track3.mp3"
+            ]
+        },
+        "default": {
+            "tracks": [
+                "simulated_default_track.mp3"
+            ]
+        }
+    },
+    "schedules": [
+        {
+            "days": [0, 1, 2, 3, 4, 5, 6],  # All days
+            "hours": list(range(24)),  # All hours
+            "playlist": "test_playlist"
+        }
+    ]
+}
+
+# The configuration never changes, so serialize it only once
+_TEST_CONFIG_YAML = yaml.dump(TEST_CONFIG, Dumper=_Dumper, default_flow_style=False)
+
+
 def create_test_config(music_dir):
     """Create a test configuration file for the simulation."""
-    import yaml
-
     # Create the music directory if it doesn't exist
     os.makedirs(music_dir, exist_ok=True)
 
-    # Create a test configuration file
-    config_path = os.path.join(music_dir, "music_config.yaml")
-
-    # Define a simple configuration for testing
-    config = {
-        "playlists": {
-            "test_playlist": {
-                "tracks": [
-                    "simulated_track1.mp3",
-                    "simulated_track2.mp3",
-                    "simulated_track3.mp3"
-                ]
-            },
-            "default": {
-                "tracks": [
-                    "simulated_default_track.mp3"
-                ]
-            }
-        },
-        "schedules": [
-            {
-                "days": [0, 1, 2, 3, 4, 5, 6],  # All days
-                "hours": list(range(24)),  # All hours
-                "playlist": "test_playlist"
-            }
-        ]
-    }
-
     # Write the configuration to the file
+    config_path = os.path.join(music_dir, "music_config.yaml")
     with open(config_path, 'w') as f:
-        yaml.dump(config, f)
+        f.write(_TEST_CONFIG_YAML)
 
-    logger.info(f"Created test configuration file at {config_path}")
+    logger.info("Created test configuration file at %s", config_path)
     return config_path
 
+def step_until(system: CrescendoSystem, condition, max_steps: int = 10) -> bool:
+    """
+    Run iterations of the system's main loop until a condition holds.
+
+    Args:
+        system: The system to step
+        condition: Function returning True once the condition holds
+        max_steps: Maximum number of iterations to run
+
+    Returns:
+        bool: True if the condition holds, False if it didn't after max_steps iterations
+    """
+    for _ in range(max_steps):
+        if condition():
+            return True
+        system.step()
+    return condition()
+
 def run_simulation():
     """Run a simulation of the Crescendo system."""
     logger.info("Starting Crescendo AI simulation")
@@ -337,25 +368,21 @@ def run_simulation():
     system = SimulatedCrescendoSystem(
         sensor_port="simulated_port",
         music_dir=music_dir,
-        check_interval=1.0,
         config_path=config_path
     )
 
-    # Start the system in a separate thread
-    system_thread = threading.Thread(target=system.run)
-    system_thread.daemon = True
-    system_thread.start()
+    # Drive the main loop step by step from this thread, so every check is deterministic
+    if not system.initialize():
+        logger.error("✗ Failed to initialize the simulated system")
+        return
 
     try:
-        # Wait for the system to initialize
-        time.sleep(2)
-
         # Simulate presence detection
         logger.info("Simulating presence detection...")
         system.sensor.set_presence(True)
 
-        # Wait to see the system respond
-        time.sleep(3)
+        # Continuous motion has to be seen by several checks
+        step_until(system, system.audio_player.is_playing)
 
         # Verify that music is playing
         if system.audio_player.is_playing():
@@ -369,7 +396,7 @@ def run_simulation():
 
         # Wait a short time for the system to respond
         logger.info("Waiting for system to respond to no presence...")
-        time.sleep(3)
+        step_until(system, lambda: not system.audio_player.is_playing())
 
         # Verify that music stopped
         if not system.audio_player.is_playing():
@@ -382,7 +409,7 @@ def run_simulation():
         system.sensor.set_presence(True)
 
         # Wait to see the system respond
-        time.sleep(3)
+        step_until(system, system.audio_player.is_playing)
 
         # Verify that music is playing again
         if system.audio_player.is_playing():
@@ -402,9 +429,9 @@ def run_simulation():
         # Verify the current track is from the playlist
         current_track = system.audio_player._current_track
         if "simulated_track" in current_track:
-            logger.info(f"✓ Playing track from playlist: {current_track}")
+            logger.info("✓ Playing track from playlist: %s", current_track)
         else:
-            logger.error(f"✗ Not playing track from playlist: {current_track}")
+            logger.error("✗ Not playing track from playlist: %s", current_track)
 
         # Test playing the next track in the playlist
         if system.audio_player.play_next_track():
@@ -415,9 +442,9 @@ def run_simulation():
         # Verify the current track is the next track in the playlist
         new_current_track = system.audio_player._current_track
         if new_current_track != current_track:
-            logger.info(f"✓ Advanced to next track: {new_current_track}")
+            logger.info("✓ Advanced to next track: %s", new_current_track)
         else:
-            logger.error(f"✗ Failed to advance to next track: {new_current_track}")
+            logger.error("✗ Failed to advance to next track: %s", new_current_track)
 
         # Test the check_for_track_end method
         logger.info("Testing check_for_track_end method...")
@@ -429,15 +456,17 @@ def run_simulation():
     except KeyboardInterrupt:
         logger.info("Simulation interrupted by user")
     except Exception as e:
-        logger.error(f"Error during simulation: {e}", exc_info=True)
+        logger.error("Error during simulation: %s", e, exc_info=True)
     finally:
         # Stop the system
-        system.running = False
-        system_thread.join(timeout=2)
+        system.shutdown()
         logger.info("Simulation ended")
 
 
 if __name__ == "__main__":
+    # Log progress when run as a script, pytest configures logging itself
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
     # Create the tests directory if it doesn't exist
     os.makedirs("tests", exist_ok=True)
 